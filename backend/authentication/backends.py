@@ -0,0 +1,140 @@
+"""
+JWT authentication that does not query the user table on every request.
+
+simplejwt's ``JWTAuthentication`` loads the ``User`` row for each
+authenticated request, predictor calls included. ``CachedJWTAuthentication``
+keeps recently seen users in a bounded in-process cache with a TTL instead.
+Saving or deleting a user drops its entry through model signals. Changes
+that bypass signals (``QuerySet.update()``, other worker processes) show up
+once the entry expires.
+
+With ``AUTH_STATELESS_READ_ONLY`` on, safe-method requests (GET, HEAD,
+OPTIONS) skip even the cache: the user is built from the token's claims
+alone, which get_tokens_for_user() fills with the profile fields.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+# Profile fields copied into tokens so stateless users can be serialized
+PROFILE_CLAIMS = ('username', 'email', 'first_name', 'last_name')
+
+
+class UserCache:
+    """Thread-safe LRU of user objects whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        """Return the cached user, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(user_id)
+            return entry[0]
+
+    def set(self, user_id, user):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class ProfileTokenUser(TokenUser):
+    """A TokenUser that also exposes the profile claims added at login."""
+
+    @property
+    def email(self):
+        return self.token.get('email', '')
+
+    @property
+    def first_name(self):
+        return self.token.get('first_name', '')
+
+    @property
+    def last_name(self):
+        return self.token.get('last_name', '')
+
+
+user_cache = UserCache(
+    getattr(settings, 'AUTH_USER_CACHE_SIZE', 1024),
+    getattr(settings, 'AUTH_USER_CACHE_TTL', 60),
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Drop-in replacement for simplejwt's JWTAuthentication that resolves users
+    from the token plus ``user_cache`` rather than one query per request.
+    """
+
+    def authenticate(self, request):
+        # DRF builds a fresh authenticator per request, so this is not shared
+        self.stateless = (
+            getattr(settings, 'AUTH_STATELESS_READ_ONLY', False) and request.method in SAFE_METHODS
+        )
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        if getattr(self, 'stateless', False):
+            return ProfileTokenUser(validated_token)
+
+        # Claims may carry the id as a string; the signals see the pk
+        user = user_cache.get(str(user_id))
+        if user is None:
+            try:
+                user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+            user_cache.set(str(user_id), user)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        # Requests may modify request.user; keep the cached instance pristine
+        return copy.copy(user)
@@ -0,0 +1,258 @@
+"""
+Google ID token verification with a process-wide certificate cache.
+
+``id_token.verify_oauth2_token(token, requests.Request())`` fetches Google's
+signing certificates over a fresh connection on every call. Google serves
+them with a ``Cache-Control: max-age`` of several hours, so this module keeps
+them in memory for as long as the response allows, fetches them through one
+pooled ``requests`` session, and refreshes them in a background thread
+shortly before they expire so logins never wait on the network in steady
+state.
+"""
+import email.utils
+import logging
+import re
+import threading
+import time
+
+from google.auth import jwt
+
+logger = logging.getLogger(__name__)
+
+# Google's PEM certificate endpoint, the one id_token.verify_oauth2_token uses
+GOOGLE_CERTS_URL = 'https://www.googleapis.com/oauth2/v1/certs'
+GOOGLE_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+
+# Used when the response carries no usable cache headers
+DEFAULT_TTL = 300
+# Minimum seconds between fetches triggered by an unknown key id
+MIN_REFETCH_INTERVAL = 30
+
+_MAX_AGE = re.compile(r'(?:^|,)\s*(?:s-)?max-age\s*=\s*"?(\d+)"?', re.IGNORECASE)
+
+
+class CertificateFetchError(Exception):
+    """Google's signing certificates could not be fetched."""
+
+
+def cache_lifetime(headers, default=DEFAULT_TTL):
+    """
+    Seconds a certificate response may be reused, from its cache headers.
+
+    ``Cache-Control: max-age`` (less ``Age``) wins over ``Expires``;
+    ``no-store``/``no-cache`` mean the response must not be reused.
+    """
+    cache_control = headers.get('Cache-Control', '')
+    if re.search(r'no-(store|cache)', cache_control, re.IGNORECASE):
+        return 0
+    match = _MAX_AGE.search(cache_control)
+    if match:
+        try:
+            age = int(headers.get('Age', 0))
+        except ValueError:
+            age = 0
+        return max(int(match.group(1)) - age, 0)
+    if headers.get('Expires'):
+        try:
+            expires = email.utils.parsedate_to_datetime(headers['Expires']).timestamp()
+            return max(expires - time.time(), 0)
+        except (TypeError, ValueError):
+            return 0
+    return default
+
+
+class CertificateCache:
+    """
+    Google's signing keys, cached for as long as their headers allow.
+
+    Both formats Google publishes are understood: ``{key id: PEM cert}``
+    (the default v1 URL) and a JWK Set. A refresh starts in the background
+    once less than ``refresh_margin`` of the lifetime is left; only an
+    empty or expired cache makes the caller wait for the fetch. Fetches are
+    serialized, so concurrent logins on a cold cache share one request.
+    """
+
+    def __init__(self, url=GOOGLE_CERTS_URL, timeout=5, refresh_margin=0.1, session=None):
+        self.url = url
+        self.timeout = timeout
+        self.refresh_margin = refresh_margin
+        self.fetches = 0
+        self._session = session
+        self._certs = None
+        self._fetched_at = 0.0
+        self._expires_at = 0.0
+        self._refresh_at = 0.0
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._refreshing = False
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            self._session = session
+        return self._session
+
+    def _fetch(self):
+        import requests
+
+        try:
+            response = self.session.get(self.url, timeout=self.timeout)
+            response.raise_for_status()
+            payload = response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise CertificateFetchError(f'Could not fetch Google certificates: {e}') from e
+
+        if 'keys' in payload:
+            from jwt.api_jwk import PyJWKSet
+
+            keys = {key.key_id: key for key in PyJWKSet.from_dict(payload).keys
+                    if key.public_key_use in ('sig', None)}
+            certs = ('jwk', keys)
+        else:
+            certs = ('pem', payload)
+
+        lifetime = cache_lifetime(response.headers)
+        now = time.monotonic()
+        with self._lock:
+            self.fetches += 1
+            self._certs = certs
+            self._fetched_at = now
+            self._expires_at = now + lifetime
+            self._refresh_at = now + lifetime * (1 - self.refresh_margin)
+        return certs
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def refresh():
+            try:
+                with self._fetch_lock:
+                    self._fetch()
+            except CertificateFetchError:
+                # Keep serving the current keys until they expire
+                logger.warning('Background refresh of Google certificates failed', exc_info=True)
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=refresh, name='google-certs-refresh', daemon=True).start()
+
+    def get(self, force=False):
+        """
+        Return the current keys as ``(format, keys)``.
+
+        Args:
+            force: Refetch now, e.g. for a key id the cache does not know;
+                ignored if the keys were fetched within MIN_REFETCH_INTERVAL
+
+        Raises:
+            CertificateFetchError: If there are no usable keys and the fetch fails
+        """
+        certs = self._usable(force)
+        if certs is not None:
+            if time.monotonic() >= self._refresh_at:
+                self._refresh_in_background()
+            return certs
+        with self._fetch_lock:
+            # Another caller may have fetched while this one waited
+            certs = self._usable(force)
+            if certs is not None:
+                return certs
+            return self._fetch()
+
+    def _usable(self, force):
+        """The cached keys, or None if they are expired or due a forced refetch."""
+        now = time.monotonic()
+        certs = self._certs
+        if certs is None or now >= self._expires_at:
+            return None
+        if force and now - self._fetched_at >= MIN_REFETCH_INTERVAL:
+            return None
+        return certs
+
+    def clear(self):
+        with self._lock:
+            self._certs = None
+            self._expires_at = self._refresh_at = 0.0
+
+
+class GoogleTokenVerifier:
+    """Verifies Google-issued ID tokens against the cached certificates."""
+
+    def __init__(self, cache, clock_skew_in_seconds=0):
+        self.cache = cache
+        self.clock_skew_in_seconds = clock_skew_in_seconds
+
+    def verify(self, token, audience=None):
+        """
+        Verify an ID token's signature, expiry and issuer, like
+        ``id_token.verify_oauth2_token``.
+
+        Args:
+            token: The encoded ID token
+            audience: Expected ``aud`` (client ID); None skips the check
+
+        Returns:
+            The decoded token claims
+
+        Raises:
+            ValueError: If the token is invalid
+            CertificateFetchError: If the certificates could not be fetched
+        """
+        if isinstance(token, bytes):
+            token = token.decode('utf-8')
+        kid = jwt.decode_header(token).get('kid')
+
+        kind, keys = self.cache.get()
+        if kid not in keys:
+            # Google rotated its keys since the last fetch
+            kind, keys = self.cache.get(force=True)
+
+        if kind == 'jwk':
+            idinfo = self._decode_jwk(token, keys, kid, audience)
+        else:
+            idinfo = jwt.decode(
+                token, certs=keys, audience=audience,
+                clock_skew_in_seconds=self.clock_skew_in_seconds,
+            )
+
+        if idinfo.get('iss') not in GOOGLE_ISSUERS:
+            raise ValueError(f"Wrong issuer. 'iss' should be one of the following: {list(GOOGLE_ISSUERS)}")
+        return idinfo
+
+    def _decode_jwk(self, token, keys, kid, audience):
+        import jwt as jwt_lib
+
+        key = keys.get(kid)
+        if key is None:
+            raise ValueError(f'Unable to find a signing key that matches: "{kid}"')
+        try:
+            return jwt_lib.decode(
+                token, key.key, algorithms=[key.algorithm_name], audience=audience,
+                leeway=self.clock_skew_in_seconds,
+                options={'verify_aud': audience is not None},
+            )
+        except jwt_lib.PyJWTError as e:
+            raise ValueError(str(e)) from e
+
+
+def _setting(name, default):
+    from django.conf import settings
+    return getattr(settings, name, default)
+
+
+google_verifier = GoogleTokenVerifier(
+    CertificateCache(
+        url=_setting('GOOGLE_CERTS_URL', GOOGLE_CERTS_URL),
+        timeout=_setting('GOOGLE_CERTS_TIMEOUT', 5),
+    ),
+)
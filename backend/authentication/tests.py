@@ -0,0 +1,317 @@
+import datetime
+import email.utils
+import http.server
+import json
+import os
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from authentication import google
+from authentication.backends import user_cache
+from authentication.google import (
+    CertificateCache, CertificateFetchError, GoogleTokenVerifier, cache_lifetime,
+)
+from authentication.views import get_tokens_for_user
+
+KEY_ID = 'test-key'
+
+
+def make_signing_key():
+    """A fresh RSA key and a self-signed certificate for it, as PEM strings."""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.x509.oid import NameOID
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'test.local')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    key_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    return key_pem, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+def make_token(key_pem, key_id=KEY_ID, issuer='https://accounts.google.com',
+               email='student@example.com', given_name='Ana', family_name='Silva'):
+    from google.auth import crypt, jwt
+
+    now = int(time.time())
+    signer = crypt.RSASigner.from_string(key_pem, key_id=key_id)
+    return jwt.encode(signer, {
+        'iss': issuer,
+        'aud': 'test-client-id',
+        'sub': '1234567890',
+        'email': email,
+        'given_name': given_name,
+        'family_name': family_name,
+        'iat': now,
+        'exp': now + 3600,
+    }).decode()
+
+
+class FakeCertServer:
+    """Local stand-in for Google's certificate endpoint, counting requests."""
+
+    def __init__(self, cert_pem):
+        self.body = json.dumps({KEY_ID: cert_pem}).encode()
+        self.headers = {'Cache-Control': 'public, max-age=3600'}
+        self.latency = 0
+        self.hits = 0
+        outer = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                outer.hits += 1
+                time.sleep(outer.latency)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(outer.body)))
+                for name, value in outer.headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(outer.body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/oauth2/v1/certs'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class CertServerMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.key_pem, cert_pem = make_signing_key()
+        cls.certs = FakeCertServer(cert_pem)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.certs.close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.certs.headers = {'Cache-Control': 'public, max-age=3600'}
+        self.certs.latency = 0
+        self.certs.hits = 0
+
+
+class CacheLifetimeTests(SimpleTestCase):
+    def test_max_age_less_age(self):
+        self.assertEqual(cache_lifetime({'Cache-Control': 'public, max-age=600', 'Age': '100'}), 500)
+
+    def test_expires(self):
+        expires = email.utils.formatdate(time.time() + 120, usegmt=True)
+        self.assertAlmostEqual(cache_lifetime({'Expires': expires}), 120, delta=2)
+
+    def test_max_age_wins_over_expires(self):
+        expires = email.utils.formatdate(time.time() + 120, usegmt=True)
+        self.assertEqual(cache_lifetime({'Cache-Control': 'max-age=30', 'Expires': expires}), 30)
+
+    def test_no_store_and_no_cache(self):
+        self.assertEqual(cache_lifetime({'Cache-Control': 'no-store'}), 0)
+        self.assertEqual(cache_lifetime({'Cache-Control': 'no-cache, max-age=600'}), 0)
+
+    def test_default_without_headers(self):
+        self.assertEqual(cache_lifetime({}), google.DEFAULT_TTL)
+
+
+class CertificateCacheTests(CertServerMixin, SimpleTestCase):
+    def test_reuses_keys_within_max_age(self):
+        cache = CertificateCache(self.certs.url)
+        kind, keys = cache.get()
+        cache.get()
+        self.assertEqual(kind, 'pem')
+        self.assertIn(KEY_ID, keys)
+        self.assertEqual(self.certs.hits, 1)
+
+    def test_refetches_when_expired(self):
+        self.certs.headers = {'Expires': email.utils.formatdate(time.time() - 60, usegmt=True)}
+        cache = CertificateCache(self.certs.url)
+        cache.get()
+        cache.get()
+        self.assertEqual(self.certs.hits, 2)
+
+    def test_no_store_is_never_reused(self):
+        self.certs.headers = {'Cache-Control': 'no-store'}
+        cache = CertificateCache(self.certs.url)
+        cache.get()
+        cache.get()
+        self.assertEqual(self.certs.hits, 2)
+
+    def test_concurrent_cold_fetches_share_one_request(self):
+        self.certs.latency = 0.2
+        cache = CertificateCache(self.certs.url)
+        threads = [threading.Thread(target=cache.get) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.certs.hits, 1)
+
+    def test_refreshes_in_background(self):
+        self.certs.headers = {'Cache-Control': 'max-age=2'}
+        cache = CertificateCache(self.certs.url, refresh_margin=0.9)
+        cache.get()
+        time.sleep(0.3)
+
+        self.certs.latency = 0.5
+        start = time.monotonic()
+        cache.get()
+        self.assertLess(time.monotonic() - start, 0.25)
+
+        deadline = time.monotonic() + 3
+        while cache.fetches < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(cache.fetches, 2)
+
+    def test_fetch_failure_raises(self):
+        cache = CertificateCache('http://127.0.0.1:1/certs', timeout=1)
+        with self.assertRaises(CertificateFetchError):
+            cache.get()
+
+
+class GoogleTokenVerifierTests(CertServerMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.verifier = GoogleTokenVerifier(CertificateCache(self.certs.url))
+
+    def test_verifies_token(self):
+        idinfo = self.verifier.verify(make_token(self.key_pem))
+        self.assertEqual(idinfo['email'], 'student@example.com')
+
+    def test_rejects_wrong_issuer(self):
+        with self.assertRaisesRegex(ValueError, 'Wrong issuer'):
+            self.verifier.verify(make_token(self.key_pem, issuer='https://evil.example.com'))
+
+    def test_unknown_kid_refetch_is_rate_limited(self):
+        token = make_token(self.key_pem, key_id='rotated-key')
+        self.verifier.cache.get()
+        # Fetched just now, so the forced refetch is skipped
+        with self.assertRaises(ValueError):
+            self.verifier.verify(token)
+        self.assertEqual(self.certs.hits, 1)
+
+        with mock.patch.object(google, 'MIN_REFETCH_INTERVAL', 0):
+            with self.assertRaises(ValueError):
+                self.verifier.verify(token)
+        self.assertEqual(self.certs.hits, 2)
+
+
+@mock.patch.dict(os.environ, {'GOOGLE_CLIENT_ID': 'test-client-id'})
+class GoogleLoginTests(CertServerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch(
+            'authentication.views.google_verifier', GoogleTokenVerifier(CertificateCache(self.certs.url))
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def login(self, token):
+        return self.client.post('/api/auth/google/', {'credential': token}, content_type='application/json')
+
+    def test_repeat_login_with_unchanged_profile_writes_nothing(self):
+        token = make_token(self.key_pem)
+        self.assertEqual(self.login(token).status_code, 200)
+        self.assertTrue(User.objects.filter(email='student@example.com').exists())
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.login(token)
+        self.assertEqual(response.status_code, 200)
+        writes = [query['sql'] for query in queries.captured_queries
+                  if query['sql'].lstrip().upper().startswith(('UPDATE', 'INSERT'))]
+        self.assertEqual(writes, [])
+        self.assertEqual(self.certs.hits, 1)
+
+    def test_changed_profile_updates_only_changed_fields(self):
+        self.login(make_token(self.key_pem))
+        with CaptureQueriesContext(connection) as queries:
+            self.login(make_token(self.key_pem, given_name='Ana Maria'))
+        updates = [query['sql'] for query in queries.captured_queries
+                   if query['sql'].lstrip().upper().startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('first_name', updates[0])
+        self.assertNotIn('last_name', updates[0])
+        self.assertEqual(User.objects.get(email='student@example.com').first_name, 'Ana Maria')
+
+    def test_wrong_issuer_is_rejected(self):
+        response = self.login(make_token(self.key_pem, issuer='https://evil.example.com'))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(User.objects.exists())
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.user = User.objects.create_user(
+            username='ana', email='student@example.com', first_name='Ana', last_name='Silva'
+        )
+        self.auth = {'HTTP_AUTHORIZATION': f"Bearer {get_tokens_for_user(self.user)['access']}"}
+
+    def get_user_info(self):
+        return self.client.get('/api/auth/user/', **self.auth)
+
+    def test_cache_hit_makes_no_queries(self):
+        self.assertEqual(self.get_user_info().status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.get_user_info()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['email'], 'student@example.com')
+
+    def test_save_invalidates_cached_user(self):
+        self.get_user_info()
+        self.user.first_name = 'Ana Maria'
+        self.user.save()
+        self.assertIsNone(user_cache.get(str(self.user.pk)))
+        self.assertEqual(self.get_user_info().json()['first_name'], 'Ana Maria')
+
+    def test_delete_invalidates_cached_user(self):
+        self.get_user_info()
+        self.user.delete()
+        self.assertEqual(self.get_user_info().status_code, 401)
+
+    def test_inactive_user_is_rejected(self):
+        self.get_user_info()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get_user_info().status_code, 401)
+
+    @override_settings(AUTH_STATELESS_READ_ONLY=True)
+    def test_stateless_reads_trust_the_token_until_it_expires(self):
+        self.user.is_active = False
+        self.user.save()
+        # Documented trade-off: safe methods build the user from the token's
+        # claims, so deactivation only takes effect for them at token expiry
+        with self.assertNumQueries(0):
+            response = self.get_user_info()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['email'], 'student@example.com')
+        # Unsafe methods still load the user and see the deactivation
+        self.assertEqual(self.client.post('/api/auth/logout/', **self.auth).status_code, 401)
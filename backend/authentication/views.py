@@ -1,6 +1,5 @@
 import os
-from google.oauth2 import id_token
-from google.auth.transport import requests
+from google.auth.exceptions import GoogleAuthError
 from django.contrib.auth.models import User
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
@@ -8,11 +7,16 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from .serializers import UserSerializer
+from .backends import PROFILE_CLAIMS
+from .google import CertificateFetchError, google_verifier
 
 
 def get_tokens_for_user(user):
     """Generate JWT tokens for a user"""
     refresh = RefreshToken.for_user(user)
+    # Profile claims let read-only requests run on stateless token users
+    for claim in PROFILE_CLAIMS:
+        refresh[claim] = getattr(user, claim)
     return {
         'refresh': str(refresh),
         'access': str(refresh.access_token),
@@ -42,23 +46,25 @@ def google_login(request):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-        # Verify the Google token - try without audience first
+        # Verify the Google token against the cached signing certificates
         try:
             # Verify without specifying audience (more permissive)
-            idinfo = id_token.verify_oauth2_token(
-                token, 
-                requests.Request()
-            )
+            idinfo = google_verifier.verify(token)
             
             # Check if it's a valid Google token
             if 'email' not in idinfo:
                 raise ValueError("No email in token")
                 
-        except ValueError as e:
+        except (ValueError, GoogleAuthError) as e:
             return Response(
                 {'error': 'Invalid token', 'details': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        except CertificateFetchError as e:
+            return Response(
+                {'error': 'Google sign-in is temporarily unavailable', 'details': str(e)},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
 
         # Get user info from Google
         email = idinfo.get('email')
@@ -83,11 +89,15 @@ def google_login(request):
             }
         )
 
-        # Update user info if not newly created
+        # Update user info if not newly created, writing only what changed
         if not created:
-            user.first_name = first_name
-            user.last_name = last_name
-            user.save()
+            changed = []
+            for field, value in (('first_name', first_name), ('last_name', last_name)):
+                if getattr(user, field) != value:
+                    setattr(user, field, value)
+                    changed.append(field)
+            if changed:
+                user.save(update_fields=changed)
 
         # Generate JWT tokens
         tokens = get_tokens_for_user(user)
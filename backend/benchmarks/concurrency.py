@@ -0,0 +1,128 @@
+"""
+Concurrency scaling of the ASGI (uvicorn) deployment against WSGI.
+
+Run from the backend directory (uvicorn must be installed):
+
+    python benchmarks/concurrency.py
+    python benchmarks/concurrency.py --levels 1 8 32 --duration 3
+
+Both servers run as subprocesses on one throwaway database. The WSGI side is
+Django's threaded WSGI server with the sync DRF views; the ASGI side is a
+single uvicorn worker serving the async views (student_performance/asgi.py
+turns PREDICTOR_ASYNC_VIEWS on). Each endpoint is driven at every
+concurrency level and throughput and latency percentiles are reported.
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+from benchmarks.run import run_load  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def serve_wsgi(port):
+    """Entry point for the WSGI server subprocess."""
+    import django
+    django.setup()
+    from benchmarks.run import start_server
+    server = start_server(port)
+    try:
+        while True:
+            time.sleep(3600)
+    finally:
+        server.shutdown()
+
+
+def start(kind, port, env):
+    if kind == 'wsgi':
+        command = [sys.executable, __file__, '--serve-wsgi', str(port)]
+    else:
+        command = [
+            sys.executable, '-m', 'uvicorn', 'student_performance.asgi:application',
+            '--port', str(port), '--log-level', 'warning', '--no-access-log',
+        ]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f'{kind} server did not start')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ASGI vs WSGI concurrency benchmark')
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 8, 32, 64],
+                        help='client concurrency levels')
+    parser.add_argument('--duration', type=float, default=3.0, help='seconds of load per endpoint')
+    parser.add_argument('--serve-wsgi', type=int, metavar='PORT', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_wsgi:
+        return serve_wsgi(args.serve_wsgi)
+
+    try:
+        import uvicorn  # noqa: F401
+    except ImportError:
+        print('uvicorn is not installed: pip install uvicorn')
+        return 1
+
+    fd, db_path = tempfile.mkstemp(suffix='.sqlite3', prefix='student_performance_bench_')
+    os.close(fd)
+    env = dict(os.environ, PREDICTOR_BENCH_DB=db_path, PYTHONPATH=BACKEND_DIR)
+    subprocess.run(
+        [sys.executable, 'manage.py', 'migrate', '--verbosity', '0'],
+        cwd=BACKEND_DIR, env=env, check=True
+    )
+
+    results = {}
+    try:
+        for kind in ('wsgi', 'asgi'):
+            port = free_port()
+            process = start(kind, port, env)
+            try:
+                for level in args.levels:
+                    results[kind, level] = run_load(port, level, args.duration)
+            finally:
+                process.terminate()
+                process.wait()
+    finally:
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+    endpoints = next(iter(results.values())).keys()
+    for endpoint in endpoints:
+        print(f'\n{endpoint}')
+        print(f"  {'clients':>8}{'WSGI req/s':>12}{'ASGI req/s':>12}{'WSGI p99':>11}{'ASGI p99':>11}{'ASGI err':>10}")
+        for level in args.levels:
+            wsgi, asgi = results['wsgi', level][endpoint], results['asgi', level][endpoint]
+            print(
+                f"  {level:>8}{wsgi['throughput_rps']:>12.1f}{asgi['throughput_rps']:>12.1f}"
+                f"{wsgi['p99_ms']:>9.2f}ms{asgi['p99_ms']:>9.2f}ms{asgi['errors']:>10}"
+            )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
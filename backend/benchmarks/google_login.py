@@ -0,0 +1,246 @@
+"""
+Google login latency with the cached certificate verifier.
+
+Run from the backend directory:
+
+    python benchmarks/google_login.py
+    python benchmarks/google_login.py --logins 500 --cert-latency-ms 80
+
+A local HTTP server stands in for Google's certificate endpoint: it serves
+a freshly generated self-signed certificate with ``Cache-Control: max-age``
+and sleeps ``--cert-latency-ms`` per request to model the round trip to
+Google. ID tokens are signed with the matching key.
+
+Reported:
+    verify      the old per-login ``id_token.verify_token`` with a fresh
+                transport against the cached verifier
+    login       POST /api/auth/google/ for a first login (empty cache, new
+                user) and repeat logins (warm cache, unchanged profile)
+    refresh     logins across several short certificate lifetimes, showing
+                the refetches happen off the request path
+
+along with how many times the certificate endpoint was hit and how many
+user rows were written.
+"""
+import argparse
+import datetime
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+from benchmarks.run import summarize  # noqa: E402
+
+KEY_ID = 'bench-key'
+
+
+def make_signing_key():
+    """A fresh RSA key and a self-signed certificate for it, as PEM strings."""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.x509.oid import NameOID
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'bench.local')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    key_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    return key_pem, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+class FakeCertServer:
+    """Serves ``{KEY_ID: cert}`` with a max-age, counting requests."""
+
+    def __init__(self, cert_pem, max_age, latency):
+        self.body = json.dumps({KEY_ID: cert_pem}).encode()
+        self.max_age = max_age
+        self.latency = latency
+        self.hits = 0
+        outer = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                outer.hits += 1
+                time.sleep(outer.latency)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(outer.body)))
+                self.send_header('Cache-Control', f'public, max-age={outer.max_age}')
+                self.end_headers()
+                self.wfile.write(outer.body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/oauth2/v1/certs'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+def _summary(samples, **counts):
+    return dict(summarize(samples), max_ms=max(samples) * 1000, **counts)
+
+
+def _time(func, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def make_token(key_pem, email, given_name='Bench', lifetime=3600):
+    from google.auth import crypt, jwt
+
+    now = int(time.time())
+    signer = crypt.RSASigner.from_string(key_pem, key_id=KEY_ID)
+    return jwt.encode(signer, {
+        'iss': 'https://accounts.google.com',
+        'aud': 'bench-client-id',
+        'sub': '1234567890' + email.split('@')[0],
+        'email': email,
+        'given_name': given_name,
+        'family_name': 'User',
+        'iat': now,
+        'exp': now + lifetime,
+    }).decode()
+
+
+def bench_verify(certs, token, url, iterations):
+    from google.auth.transport import requests as google_requests
+    from google.oauth2 import id_token
+    from authentication.google import CertificateCache, GoogleTokenVerifier
+
+    results = {}
+    certs.hits = 0
+    samples = _time(lambda: id_token.verify_token(token, google_requests.Request(), certs_url=url), iterations)
+    results['fresh transport'] = _summary(samples, fetches=certs.hits)
+
+    verifier = GoogleTokenVerifier(CertificateCache(url))
+    certs.hits = 0
+    samples = _time(lambda: verifier.verify(token), iterations)
+    results['cached verifier'] = _summary(samples, fetches=certs.hits)
+    return results
+
+
+def bench_login(certs, key_pem, logins):
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+    from authentication.google import google_verifier
+
+    client = Client()
+    google_verifier.cache.clear()
+    certs.hits = 0
+    token = make_token(key_pem, f'student{time.time_ns()}@example.com')
+
+    def login():
+        response = client.post('/api/auth/google/', {'credential': token}, content_type='application/json')
+        assert response.status_code == 200, response.content
+
+    results = {'first login': _summary(_time(login, 1), fetches=certs.hits)}
+    assert User.objects.filter(email__startswith='student').exists()
+
+    certs.hits = 0
+    with CaptureQueriesContext(connection) as queries:
+        samples = _time(login, logins)
+    writes = sum(1 for query in queries.captured_queries
+                 if query['sql'].lstrip().upper().startswith(('UPDATE', 'INSERT')))
+    results['repeat login'] = _summary(samples, fetches=certs.hits, writes=writes)
+    return results
+
+
+def bench_refresh(certs, key_pem, max_age, duration):
+    from django.test import Client
+    from authentication.google import google_verifier
+
+    client = Client()
+    certs.max_age = max_age
+    google_verifier.cache.clear()
+    token = make_token(key_pem, 'refresh@example.com')
+    client.post('/api/auth/google/', {'credential': token}, content_type='application/json')
+
+    certs.hits = 0
+    samples = []
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        response = client.post('/api/auth/google/', {'credential': token}, content_type='application/json')
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.content
+    return {f'{duration:g} s, max-age {max_age} s': _summary(samples, fetches=certs.hits)}
+
+
+def print_table(title, results):
+    print(f"\n{title}")
+    print(f"  {'case':<26}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'fetches':>9}{'writes':>8}")
+    for name, r in results.items():
+        print(f"  {name:<26}{r['p50_ms']:>9.3f}{r['p95_ms']:>9.3f}{r['p99_ms']:>9.3f}"
+              f"{r['max_ms']:>9.3f}{r['fetches']:>9}{r.get('writes', '-'):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--logins', type=int, default=200, help='repeat logins to time')
+    parser.add_argument('--verify-iterations', type=int, default=50)
+    parser.add_argument('--cert-latency-ms', type=float, default=50,
+                        help='simulated round trip to the certificate endpoint')
+    parser.add_argument('--refresh-duration', type=float, default=3.0)
+    args = parser.parse_args()
+
+    key_pem, cert_pem = make_signing_key()
+    certs = FakeCertServer(cert_pem, max_age=21600, latency=args.cert_latency_ms / 1000)
+
+    # Must be in place before django.setup() builds the verifier
+    os.environ['GOOGLE_CERTS_URL'] = certs.url
+    os.environ.setdefault('GOOGLE_CLIENT_ID', 'bench-client-id')
+
+    import django
+    django.setup()
+    from django.conf import settings
+    from django.core.management import call_command
+
+    db_path = settings.DATABASES['default']['NAME']
+    call_command('migrate', verbosity=0)
+
+    try:
+        token = make_token(key_pem, 'verify@example.com')
+        print_table(f'Token verification ({args.cert_latency_ms:g} ms certificate round trip)',
+                    bench_verify(certs, token, certs.url, args.verify_iterations))
+        print_table('POST /api/auth/google/', bench_login(certs, key_pem, args.logins))
+        print_table('Background refresh',
+                    bench_refresh(certs, key_pem, max_age=1, duration=args.refresh_duration))
+    finally:
+        from django.db import connections
+        connections.close_all()
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        certs.server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
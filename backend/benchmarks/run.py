@@ -0,0 +1,366 @@
+"""
+Latency and throughput benchmarks for the predictor API.
+
+Run from the backend directory:
+
+    python benchmarks/run.py                  # run and compare to baseline
+    python benchmarks/run.py --save-baseline  # record a new baseline
+    python benchmarks/run.py --quick          # shorter run for local checks
+
+Micro-benchmarks time ``predict()``, ``StudentDataSerializer`` validation,
+the compiled fast-path validator and a synchronous ``Prediction`` insert.
+The load benchmark starts Django's threaded WSGI server on a throwaway
+database and drives ``/api/predict/``, ``/api/predictions/`` and
+``/api/model-info/`` from concurrent clients.
+
+Results are compared against ``baseline.json``; the run exits non-zero if a
+tail latency (p99, or p95 for short runs) grows, or a throughput drops, by
+more than ``--threshold``.
+
+Each run also times a fixed reference workload that does not touch the
+predictor, and the baseline is scaled by how much faster or slower that ran
+than when the baseline was recorded, so a busier or slower machine does not
+read as a regression. When the baseline was recorded on a different host the
+comparison only warns, unless ``--strict`` is given.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+SAMPLE_PROFILES = [
+    {'G1': 12, 'G2': 13, 'failures': 0, 'studytime': 2, 'absences': 4, 'Medu': 3,
+     'higher': 'yes', 'schoolsup': 'no'},
+    {'G1': 8, 'G2': 9, 'failures': 1, 'studytime': 1, 'absences': 12, 'Medu': 1,
+     'higher': 'yes', 'schoolsup': 'yes'},
+    {'G1': 16, 'G2': 17, 'failures': 0, 'studytime': 4, 'absences': 0, 'Medu': 4,
+     'higher': 'yes', 'schoolsup': 'no', 'school': 'MS', 'Mjob': 'teacher'},
+]
+
+
+def summarize(samples, elapsed=None):
+    """Percentiles (in ms) and, when ``elapsed`` is given, throughput."""
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    result = {
+        'n': len(ordered),
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'p50_ms': pct(50),
+        'p95_ms': pct(95),
+        'p99_ms': pct(99),
+    }
+    if elapsed:
+        result['throughput_rps'] = len(ordered) / elapsed
+    return result
+
+
+def time_calls(func, iterations):
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def host_info():
+    """What identifies the machine a baseline was recorded on."""
+    return {
+        'node': platform.node(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+    }
+
+
+def run_reference(iterations):
+    """
+    Time a fixed workload independent of the code under test.
+
+    A mix of JSON round-trips, dict/list work and a small numpy product,
+    roughly the kinds of work the predictor benchmarks do.
+    """
+    profile = dict(SAMPLE_PROFILES[0], age=17, Mjob='teacher', Fjob='other')
+    matrix = np.arange(64 * 64, dtype=np.float64).reshape(64, 64)
+
+    def work(i):
+        data = json.loads(json.dumps(profile))
+        sorted(f'{key}={value}' for key, value in data.items())
+        matrix @ matrix[i % 64]
+
+    return time_calls(work, iterations)
+
+
+def run_micro(iterations):
+    from predictor.ml_model.predictor import predict, warm_up
+    from predictor.models import Prediction
+    from predictor.serializers import StudentDataSerializer
+    from predictor.validation import student_validator
+    from predictor.ml_model.predictor import get_encoder
+
+    warm_up()
+    encoder = get_encoder()
+    row = np.zeros(encoder.n_features)
+    validated = []
+    for profile in SAMPLE_PROFILES:
+        serializer = StudentDataSerializer(data=profile)
+        serializer.is_valid(raise_exception=True)
+        validated.append(serializer.validated_data)
+
+    def validate(i):
+        StudentDataSerializer(data=SAMPLE_PROFILES[i % len(SAMPLE_PROFILES)]).is_valid()
+
+    def fast_validate(i):
+        row.fill(0)
+        student_validator.validate(SAMPLE_PROFILES[i % len(SAMPLE_PROFILES)], encoder, row)
+
+    def insert(i):
+        data = validated[i % len(validated)]
+        Prediction.build(data, predict(data)).save()
+
+    return {
+        'predict': time_calls(lambda i: predict(validated[i % len(validated)]), iterations),
+        'serializer_validation': time_calls(validate, iterations),
+        'fast_validation': time_calls(fast_validate, iterations),
+        'prediction_insert': time_calls(insert, max(100, iterations // 10)),
+    }
+
+
+def start_server(port=0):
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+    from django.core.wsgi import get_wsgi_application
+
+    class QuietHandler(WSGIRequestHandler):
+        # Headers and body go out as separate writes; without this, Nagle
+        # plus delayed ACKs add ~40 ms to every keep-alive response
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadedWSGIServer):
+        # Django's default listen backlog of 10 resets bursts of new clients
+        request_queue_size = 128
+
+    server = Server(('127.0.0.1', port), QuietHandler, allow_reuse_address=True)
+    server.set_app(get_wsgi_application())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def run_load(port, concurrency, duration, warmup_requests=20):
+    endpoints = {
+        'POST /api/predict/': ('POST', '/api/predict/'),
+        'GET /api/predictions/': ('GET', '/api/predictions/'),
+        'GET /api/model-info/': ('GET', '/api/model-info/'),
+    }
+    results = {}
+
+    for label, (method, path) in endpoints.items():
+        ready = threading.Barrier(concurrency)
+        began = deadline = None
+
+        def worker(seed):
+            nonlocal began, deadline
+            rng = random.Random(seed)
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            samples, errors = [], 0
+            # Untimed requests first, so connection setup and server thread
+            # start-up do not land in the first endpoint's tail latencies
+            for _ in range(warmup_requests):
+                if method == 'POST':
+                    conn.request(method, path, body=json.dumps(SAMPLE_PROFILES[0]),
+                                 headers={'Content-Type': 'application/json'})
+                else:
+                    conn.request(method, path)
+                conn.getresponse().read()
+            if ready.wait() == 0:
+                began = time.perf_counter()
+                deadline = began + duration
+            ready.wait()
+            while time.perf_counter() < deadline:
+                body = headers = None
+                if method == 'POST':
+                    profile = dict(rng.choice(SAMPLE_PROFILES), absences=rng.randint(0, 93))
+                    body = json.dumps(profile)
+                    headers = {'Content-Type': 'application/json'}
+                start = time.perf_counter()
+                try:
+                    conn.request(method, path, body=body, headers=headers or {})
+                    response = conn.getresponse()
+                    response.read()
+                except OSError:
+                    errors += 1
+                    conn.close()
+                    continue
+                samples.append(time.perf_counter() - start)
+                if response.status >= 400:
+                    errors += 1
+            conn.close()
+            return samples, errors
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(worker, range(concurrency)))
+        elapsed = time.perf_counter() - began
+
+        samples = [s for worker_samples, _ in outcomes for s in worker_samples]
+        results[label] = dict(summarize(samples, elapsed), errors=sum(e for _, e in outcomes))
+
+    return results
+
+
+def speed_factor(current, baseline):
+    """
+    How much slower this run's reference workload was than the baseline's.
+
+    1.0 when either side has no reference measurement.
+    """
+    now = current.get('reference', {}).get('p50_ms')
+    then = baseline.get('reference', {}).get('p50_ms')
+    if not now or not then:
+        return 1.0
+    return now / then
+
+
+# Fewer samples than this make p99 little more than the single worst one
+MIN_SAMPLES_FOR_P99 = 1000
+
+
+def compare(current, baseline, threshold, min_delta_ms=0.05, factor=1.0):
+    """
+    Return a list of regressions beyond ``threshold`` (a fraction).
+
+    Tail latency is compared at p99, or at p95 for benchmarks with fewer
+    than MIN_SAMPLES_FOR_P99 samples (``--quick`` runs). Baseline latencies
+    are multiplied, and throughputs divided, by ``factor`` (see
+    speed_factor) before comparing. Latency changes smaller than
+    ``min_delta_ms`` are ignored so timer noise on microsecond-scale
+    benchmarks does not fail the run.
+    """
+    regressions = []
+    for section in ('micro', 'load'):
+        for name, stats in current.get(section, {}).items():
+            base = baseline.get(section, {}).get(name)
+            if not base:
+                continue
+            tail = 'p99' if stats['n'] >= MIN_SAMPLES_FOR_P99 else 'p95'
+            latency = base[f'{tail}_ms'] * factor
+            if (stats[f'{tail}_ms'] > latency * (1 + threshold)
+                    and stats[f'{tail}_ms'] - latency > min_delta_ms):
+                regressions.append(
+                    f"{section}/{name}: {tail} {stats[f'{tail}_ms']:.3f} ms vs baseline {latency:.3f} ms"
+                )
+            if 'throughput_rps' in base:
+                rps = base['throughput_rps'] / factor
+                if stats['throughput_rps'] < rps * (1 - threshold):
+                    regressions.append(
+                        f"{section}/{name}: {stats['throughput_rps']:.1f} req/s vs baseline {rps:.1f} req/s"
+                    )
+    return regressions
+
+
+def print_table(title, results):
+    print(f"\n{title}")
+    print(f"  {'benchmark':<26}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    for name, stats in results.items():
+        rps = f"{stats['throughput_rps']:.1f}" if 'throughput_rps' in stats else '-'
+        print(f"  {name:<26}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}{rps:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Predictor API benchmarks')
+    parser.add_argument('--iterations', type=int, default=2000, help='micro-benchmark iterations')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent load clients')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds of load per endpoint')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed regression (0.25 = 25%%)')
+    parser.add_argument('--min-delta-ms', type=float, default=0.05,
+                        help='ignore p99 increases smaller than this')
+    parser.add_argument('--quick', action='store_true', help='short run (200 iterations, 1 s load)')
+    parser.add_argument('--save-baseline', action='store_true', help=f'write results to {BASELINE_PATH}')
+    parser.add_argument('--no-load', action='store_true', help='skip the HTTP load benchmark')
+    parser.add_argument('--strict', action='store_true',
+                        help='fail on regressions even against a baseline from another host')
+    args = parser.parse_args()
+    if args.quick:
+        args.iterations, args.duration = 200, 1.0
+
+    import django
+    django.setup()
+    from django.conf import settings
+    from django.core.management import call_command
+
+    db_path = settings.DATABASES['default']['NAME']
+    call_command('migrate', verbosity=0)
+
+    try:
+        results = {'host': host_info(), 'reference': run_reference(args.iterations)}
+        results['micro'] = run_micro(args.iterations)
+        print_table('Micro-benchmarks', results['micro'])
+
+        if not args.no_load:
+            server = start_server()
+            try:
+                results['load'] = run_load(server.server_address[1], args.concurrency, args.duration)
+            finally:
+                server.shutdown()
+            print_table(f'Load ({args.concurrency} clients, {args.duration:g} s per endpoint)', results['load'])
+    finally:
+        from django.db import connections
+        from predictor.history import history_writer
+        history_writer.close()
+        connections.close_all()
+        if os.path.exists(db_path):
+            os.remove(db_path)
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nBaseline saved to {BASELINE_PATH}")
+        return 0
+
+    if not os.path.exists(BASELINE_PATH):
+        print("\nNo baseline recorded; run with --save-baseline first.")
+        return 0
+
+    with open(BASELINE_PATH) as f:
+        baseline = json.load(f)
+    factor = speed_factor(results, baseline)
+    print(f"\nReference workload ran {factor:.2f}x the baseline's time; baseline scaled to match.")
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms, factor)
+    same_host = baseline.get('host') == results['host']
+    if regressions:
+        print(f"\nRegressions beyond {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        if same_host or args.strict:
+            return 1
+        print("\nBaseline was recorded on another host; reporting only (use --strict to fail).")
+        return 0
+    print(f"\nNo regressions beyond {args.threshold:.0%} against the baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
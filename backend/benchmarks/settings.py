@@ -0,0 +1,21 @@
+"""
+Settings for the benchmark suite: the project settings with a throwaway
+SQLite database so runs never touch db.sqlite3. Server subprocesses share
+the parent's database through PREDICTOR_BENCH_DB.
+"""
+import os
+import tempfile
+
+from student_performance.settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('PREDICTOR_BENCH_DB') or os.path.join(
+            tempfile.gettempdir(), f'student_performance_bench_{os.getpid()}.sqlite3'
+        ),
+    }
+}
+
+ALLOWED_HOSTS = ['*']
+DEBUG = False
@@ -0,0 +1,102 @@
+"""
+Startup-time benchmark: `manage.py check` wall time and first-request latency.
+
+Run from the backend directory:
+
+    python benchmarks/startup.py [--runs 5]
+
+First-request latency is measured in a fresh interpreter per run, once with
+PREDICTOR_WARMUP disabled and once enabled, against a throwaway in-memory
+test database.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_REQUEST_SCRIPT = r'''
+import json, os, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment
+setup_test_environment()
+connection.creation.create_test_db(verbosity=0)
+client = Client()
+t0 = time.perf_counter()
+response = client.post('/api/predict/', {'G1': 12, 'G2': 13}, content_type='application/json')
+t1 = time.perf_counter()
+client.post('/api/predict/', {'G1': 11, 'G2': 14}, content_type='application/json')
+t2 = time.perf_counter()
+assert response.status_code == 200, response.content
+print(json.dumps({
+    'setup': setup_done - start,
+    'first_request': t1 - t0,
+    'second_request': t2 - t1,
+}))
+'''
+
+
+def _env(**overrides):
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'student_performance.settings')
+    env['PYTHONWARNINGS'] = 'ignore'
+    env.update(overrides)
+    return env
+
+
+def time_manage_check(runs):
+    """Wall time of `python manage.py check` in a fresh process."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, 'manage.py', 'check'],
+            cwd=BACKEND_DIR, env=_env(), check=True,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def time_first_request(runs, warmup):
+    """django.setup() time and first/second /api/predict/ latency."""
+    results = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, '-c', FIRST_REQUEST_SCRIPT],
+            cwd=BACKEND_DIR, env=_env(PREDICTOR_WARMUP=str(warmup)), check=True,
+            capture_output=True, text=True,
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {key: [r[key] for r in results] for key in results[0]}
+
+
+def _ms(values):
+    return f"median {statistics.median(values) * 1000:8.1f} ms   min {min(values) * 1000:8.1f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"manage.py check            {_ms(time_manage_check(args.runs))}")
+    for warmup in (False, True):
+        label = 'warmup on ' if warmup else 'warmup off'
+        timings = time_first_request(args.runs, warmup)
+        print(f"[{label}] django.setup()  {_ms(timings['setup'])}")
+        print(f"[{label}] first request   {_ms(timings['first_request'])}")
+        print(f"[{label}] second request  {_ms(timings['second_request'])}")
+
+
+if __name__ == '__main__':
+    main()
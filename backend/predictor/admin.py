@@ -4,6 +4,7 @@ from .models import Prediction
 
 @admin.register(Prediction)
 class PredictionAdmin(admin.ModelAdmin):
-    list_display = ['id', 'predicted_grade', 'created_at']
-    readonly_fields = ['created_at', 'input_data', 'predicted_grade']
+    list_display = ['id', 'predicted_grade', 'grade_band', 'school', 'created_at']
+    list_filter = ['grade_band', 'school']
+    readonly_fields = ['uuid', 'created_at', 'input_data', 'predicted_grade', 'school', 'grade_band']
 
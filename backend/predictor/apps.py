@@ -1,7 +1,40 @@
+import os
+import sys
+
 from django.apps import AppConfig
+from django.conf import settings
+
+
+def _is_serving():
+    """False for management commands other than the dev server's worker process."""
+    argv = sys.argv
+    if len(argv) > 1 and os.path.basename(argv[0]) == 'manage.py':
+        if argv[1] != 'runserver':
+            return False
+        # The autoreloader's parent process never handles requests
+        return os.environ.get('RUN_MAIN') == 'true' or '--noreload' in argv
+    return True
 
 
 class PredictorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'predictor'
 
+    def ready(self):
+        if getattr(settings, 'PREDICTOR_WARMUP', False) and _is_serving():
+            from django.urls import get_resolver
+            from .ml_model.predictor import warm_up
+
+            # Import the URLconf (and with it every view module) now rather
+            # than inside the first request
+            get_resolver().url_patterns
+            try:
+                warm_up()
+            except FileNotFoundError:
+                # No trained model yet; /predict/ reports 503 until there is one
+                pass
+            if getattr(settings, 'PREDICTOR_DATASET_WARMUP', False):
+                # Parse and index the dataset CSVs before the first query;
+                # off by default as it imports pandas in every worker
+                from .datasets import dataset_store
+                dataset_store.warm_up()
@@ -0,0 +1,198 @@
+"""
+Async-native versions of the hot API views, for ASGI deployments.
+
+DRF's ``@api_view`` only produces sync views, so under ASGI every request to
+predictor/views.py holds a worker thread for its whole lifetime, including
+while it waits on the database. These views run on the event loop instead:
+validation and scoring go to the bounded ``cpu_executor`` and database access
+uses Django's async ORM.
+
+Requests to the DRF-backed endpoints go through the same DRF setup as the
+sync views (content negotiation, the configured authentication classes,
+permission and throttle checks, and the configured parsers, so JSON,
+form-encoded and multipart bodies are all accepted), run on the executor
+because authentication may query the user table. Bodies are rendered with
+DRF's JSONRenderer, so JSON clients get byte-for-byte the same bodies as
+from the sync views; the browsable API is only served by the sync views.
+urls.py routes to these views when PREDICTOR_ASYNC_VIEWS is on, which
+student_performance/asgi.py does by default.
+"""
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.views import APIView
+
+from .executor import ExecutorBusy, cpu_executor
+from .history import arecord_predictions
+from .metadata import metadata_responses
+from .metrics import stage
+from .ml_model.explain import ExplanationUnavailable
+from .models import Prediction
+from .serializers import PredictionSerializer
+from .views import (
+    add_next_page_headers, history_query, prediction_result, resolve_explain, resolve_subject,
+    validate_and_predict,
+)
+
+_renderer = JSONRenderer()
+
+
+def _json_response(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(
+        _renderer.render(data), status=status_code, content_type='application/json'
+    )
+
+
+def _method_not_allowed(request, allowed):
+    response = _json_response(
+        {'detail': f'Method "{request.method}" not allowed.'},
+        status.HTTP_405_METHOD_NOT_ALLOWED
+    )
+    response['Allow'] = ', '.join(allowed)
+    return response
+
+
+def _api_request(request, allowed):
+    """
+    Run DRF's request setup for an async view, as @api_view does for the sync ones.
+
+    Meant to run on the executor: authentication may query the user table
+    and parsing may read an uploaded body. ``request.user`` is set as under
+    WSGI, and the body is parsed before returning.
+
+    Args:
+        request: The Django HttpRequest
+        allowed: Methods advertised in the Allow header of error responses
+
+    Returns:
+        Tuple of (DRF Request, rendered error response or None)
+    """
+    close_old_connections()
+    view = APIView()
+    view.args, view.kwargs = (), {}
+    request = view.initialize_request(request)
+    view.request = request
+    view.headers = dict(view.default_response_headers, Allow=', '.join(allowed))
+    try:
+        view.initial(request)
+        request.data
+    except Exception as exc:
+        response = view.finalize_response(request, view.handle_exception(exc))
+        return request, response.render()
+    return request, None
+
+
+def _busy_response():
+    response = _json_response(
+        {'error': 'Server is busy, please retry shortly'},
+        status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    response['Retry-After'] = '1'
+    return response
+
+
+@csrf_exempt
+async def predict_grade(request):
+    """
+    Predict student's final grade based on input features.
+    """
+    if request.method != 'POST':
+        return _method_not_allowed(request, ['POST', 'OPTIONS'])
+
+    try:
+        with stage('parse'):
+            request, response = await cpu_executor.run(_api_request, request, ['POST', 'OPTIONS'])
+    except ExecutorBusy:
+        return _busy_response()
+    if response is not None:
+        return response
+    data = request.data
+
+    subject, error = resolve_subject(request.query_params, data)
+    if not error:
+        top_k, error = resolve_explain(request.query_params, data)
+    if error:
+        return _json_response({'error': error}, status.HTTP_400_BAD_REQUEST)
+
+    try:
+        input_data, predicted_grade, explanation, errors = await cpu_executor.run(
+            validate_and_predict, data, subject, top_k
+        )
+        if errors is not None:
+            return _json_response(errors, status.HTTP_400_BAD_REQUEST)
+
+        prediction = Prediction.build(input_data, predicted_grade, subject=subject)
+        with stage('db_write'):
+            await arecord_predictions([prediction])
+
+        return _json_response(prediction_result(input_data, predicted_grade, prediction, explanation))
+
+    except ExecutorBusy:
+        return _busy_response()
+    except FileNotFoundError as e:
+        return _json_response({'error': str(e)}, status.HTTP_503_SERVICE_UNAVAILABLE)
+    except ExplanationUnavailable as e:
+        return _json_response({'error': f'{e}; retry without explain'}, status.HTTP_409_CONFLICT)
+    except Exception as e:
+        return _json_response(
+            {'error': f'Prediction failed: {str(e)}'},
+            status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+async def model_info(request):
+    """
+    Get information about the trained model.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return _method_not_allowed(request, ['GET', 'HEAD', 'OPTIONS'])
+
+    subject, error = resolve_subject(request.GET)
+    if error:
+        return _json_response({'error': error}, status.HTTP_400_BAD_REQUEST)
+
+    try:
+        # The first call may load the model from disk; later ones only
+        # look up the body rendered for the active version
+        entry = await cpu_executor.run(metadata_responses.model_info, subject)
+    except ExecutorBusy:
+        return _busy_response()
+    except FileNotFoundError as e:
+        return _json_response({'error': str(e)}, status.HTTP_503_SERVICE_UNAVAILABLE)
+    return entry.respond(request)
+
+
+async def prediction_history(request):
+    """
+    Get prediction history, newest first.
+
+    Accepts the same query parameters as the sync view and, like it, is
+    eventually consistent while write-behind is on.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return _method_not_allowed(request, ['GET', 'HEAD', 'OPTIONS'])
+
+    try:
+        request, response = await cpu_executor.run(_api_request, request, ['GET', 'OPTIONS'])
+    except ExecutorBusy:
+        return _busy_response()
+    if response is not None:
+        return response
+
+    params = request.query_params
+    predictions, limit, fields, error = history_query(params)
+    if error:
+        return _json_response({'error': error}, status.HTTP_400_BAD_REQUEST)
+
+    page = [prediction async for prediction in predictions]
+    has_next = len(page) > limit
+    page = page[:limit]
+
+    response = _json_response(PredictionSerializer(page, many=True, fields=fields).data)
+
+    if has_next:
+        add_next_page_headers(response, request, params, page)
+
+    return response
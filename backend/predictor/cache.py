@@ -0,0 +1,146 @@
+"""
+LRU memoization of predictions keyed on packed student feature vectors.
+"""
+import struct
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework import serializers
+
+from .serializers import StudentDataSerializer
+from .ml_model.predictor import get_active_model
+from .metrics import stage
+
+
+class FeaturePacker:
+    """
+    Pack validated student data into a compact canonical byte string.
+
+    Every serializer field is bounded: integers become their offset from
+    ``min_value`` and choices become their index, so each profile maps to
+    a fixed-width struct with one small unsigned slot per field.
+    """
+
+    def __init__(self, fields):
+        self.names = []
+        self.offsets = []
+        self.choice_indexes = []
+        formats = []
+
+        for name, field in fields.items():
+            if isinstance(field, serializers.ChoiceField):
+                choices = list(field.choices)
+                self.offsets.append(None)
+                self.choice_indexes.append({value: i for i, value in enumerate(choices)})
+                span = len(choices)
+            else:
+                self.offsets.append(field.min_value)
+                self.choice_indexes.append(None)
+                span = field.max_value - field.min_value + 1
+            self.names.append(name)
+            formats.append('B' if span <= 0xFF else 'H' if span <= 0xFFFF else 'I')
+
+        self._struct = struct.Struct('<' + ''.join(formats))
+        self._spec = tuple(zip(self.names, self.offsets, self.choice_indexes))
+
+    def pack(self, validated_data) -> bytes:
+        """Return the canonical key for a validated profile."""
+        values = []
+        for name, offset, choice_index in self._spec:
+            value = validated_data[name]
+            values.append(choice_index[value] if offset is None else value - offset)
+        return self._struct.pack(*values)
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache of predicted grades.
+
+    Entries are keyed by model version as well as profile, so every
+    subject's model shares one cache and a hot reload never serves stale
+    grades; entries of a swapped-out version simply age out of the LRU.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        """Return the cached prediction for ``key`` under a model version, or None."""
+        with self._lock:
+            value = self._entries.get((version, key))
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end((version, key))
+            return value
+
+    def set(self, key, value, version):
+        """Store a prediction, evicting the least recently used entry if full."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[(version, key)] = value
+            self._entries.move_to_end((version, key))
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return size and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+feature_packer = FeaturePacker(StudentDataSerializer().fields)
+prediction_cache = PredictionCache(getattr(settings, 'PREDICTION_CACHE_SIZE', 4096))
+
+
+def cached_predict(input_data: dict, active=None, X=None) -> float:
+    """
+    Predict a grade, reusing the result for previously seen profiles.
+
+    Args:
+        input_data: Validated student features from StudentDataSerializer
+        active: ModelVersion to score with (defaults to the active one)
+        X: ``(1, n_features)`` row already encoded for ``active``
+
+    Returns:
+        Predicted final grade (G3)
+    """
+    if active is None:
+        active = get_active_model()
+    if prediction_cache.max_size > 0:
+        with stage('cache_lookup'):
+            key = feature_packer.pack(input_data)
+            predicted_grade = prediction_cache.get(key, active.version)
+        if predicted_grade is not None:
+            return predicted_grade
+
+    if X is None:
+        with stage('encode'):
+            X = active.encoder.encode(input_data)
+    with stage('score'):
+        predicted_grade = active.predict_encoded(X)
+
+    if prediction_cache.max_size > 0:
+        prediction_cache.set(key, predicted_grade, active.version)
+    return predicted_grade
@@ -0,0 +1,55 @@
+"""
+Allowed values and display labels of the categorical student features.
+
+StudentDataSerializer validates against these lists and the feature-options
+endpoint publishes them, so the API and the frontend's dropdowns cannot drift
+apart. Order matters: it is the order the options are shown in.
+"""
+
+_JOBS = [
+    ('teacher', 'Teacher'),
+    ('health', 'Health care'),
+    ('services', 'Civil services'),
+    ('at_home', 'At home'),
+    ('other', 'Other'),
+]
+
+_YES_NO = [('yes', 'Yes'), ('no', 'No')]
+
+FEATURE_CHOICES = {
+    'school': [('GP', 'Gabriel Pereira'), ('MS', 'Mousinho da Silveira')],
+    'sex': [('F', 'Female'), ('M', 'Male')],
+    'address': [('U', 'Urban'), ('R', 'Rural')],
+    'famsize': [('GT3', 'Greater than 3'), ('LE3', 'Less or equal to 3')],
+    'Pstatus': [('T', 'Living together'), ('A', 'Apart')],
+    'Mjob': _JOBS,
+    'Fjob': _JOBS,
+    'reason': [
+        ('home', 'Close to home'),
+        ('reputation', 'School reputation'),
+        ('course', 'Course preference'),
+        ('other', 'Other'),
+    ],
+    'guardian': [('mother', 'Mother'), ('father', 'Father'), ('other', 'Other')],
+    'schoolsup': _YES_NO,
+    'famsup': _YES_NO,
+    'paid': _YES_NO,
+    'activities': _YES_NO,
+    'nursery': _YES_NO,
+    'higher': _YES_NO,
+    'internet': _YES_NO,
+    'romantic': _YES_NO,
+}
+
+
+def choice_values(feature):
+    """Allowed values of one categorical feature, in display order."""
+    return [value for value, _ in FEATURE_CHOICES[feature]]
+
+
+def feature_options():
+    """Value/label pairs of every categorical feature, as served to the frontend."""
+    return {
+        feature: [{'value': value, 'label': label} for value, label in choices]
+        for feature, choices in FEATURE_CHOICES.items()
+    }
@@ -0,0 +1,278 @@
+"""
+Columnar in-memory index of a dataset CSV for the query endpoint.
+
+The CSV is parsed once per content hash. Every column is stored as codes
+into its sorted distinct values (all student columns are low-cardinality),
+plus one packed bitmap per value. A filter ORs the bitmaps of the values it
+selects and ANDs the columns together. Group-by finds the distinct rows
+of the code columns, and aggregates and histograms are ``bincount``/
+``reduceat`` passes over the matched rows, so a query never touches the CSV
+again.
+
+Query parameters (see DatasetIndex.query):
+    <column>=a,b        keep rows whose column is one of the values
+    <column>=lo..hi     inclusive range on a numeric column; either end may
+                        be left out (``absences=10..``)
+    group_by=c1,c2      group the matched rows by these columns
+    agg=mean:G3,count   aggregates per group: count, sum, mean, std, min, max
+    histogram=G3        counts per distinct value of the column, per group
+    columns=c1,c2       columns of the returned rows (default: all)
+    order_by=-G3        sort rows by a column, ``-`` for descending
+    offset, limit       row page (default limit 100, max 1000)
+
+Without group_by, agg or histogram the matched rows are returned a page at
+a time.
+"""
+import io
+
+import numpy as np
+
+AGGREGATES = ('count', 'sum', 'mean', 'std', 'min', 'max')
+RESERVED_PARAMS = ('group_by', 'agg', 'histogram', 'columns', 'order_by', 'offset', 'limit')
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def _names(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class Column:
+    """One dataset column as codes into its sorted values, with value bitmaps."""
+
+    __slots__ = ('name', 'numeric', 'levels', 'codes', 'bitmaps', 'values')
+
+    def __init__(self, name, values):
+        self.name = name
+        self.numeric = values.dtype.kind in 'iuf'
+        self.levels, codes = np.unique(values, return_inverse=True)
+        self.codes = codes.astype(np.int64)
+        # (n_levels, ceil(n_rows / 8)) packed row bitmaps, one per value
+        self.bitmaps = np.packbits(
+            self.codes[np.newaxis, :] == np.arange(len(self.levels))[:, np.newaxis], axis=1
+        )
+        self.values = values if self.numeric else None
+
+    def _parse(self, raw):
+        if not self.numeric:
+            return raw
+        try:
+            value = float(raw)
+        except ValueError:
+            raise ValueError(f"{self.name} filter values must be numbers, got '{raw}'")
+        return value
+
+    def selected_levels(self, spec):
+        """
+        Indices of the values a filter spec (``a,b`` or ``lo..hi``) keeps.
+
+        Raises:
+            ValueError: For malformed specs or values this column cannot hold
+        """
+        if '..' in spec:
+            if not self.numeric:
+                raise ValueError(f"{self.name} is categorical; range filters need a numeric column")
+            low, _, high = spec.partition('..')
+            start = np.searchsorted(self.levels, self._parse(low), 'left') if low.strip() else 0
+            stop = np.searchsorted(self.levels, self._parse(high), 'right') if high.strip() else len(self.levels)
+            return np.arange(start, max(start, stop))
+
+        wanted = _names(spec)
+        if not wanted:
+            raise ValueError(f"Empty filter for {self.name}")
+        selected = []
+        for raw in wanted:
+            value = self._parse(raw)
+            position = np.searchsorted(self.levels, value)
+            if position < len(self.levels) and self.levels[position] == value:
+                selected.append(position)
+            elif not self.numeric:
+                raise ValueError(
+                    f"Unknown {self.name} value '{raw}'; expected one of {', '.join(self.levels.tolist())}"
+                )
+        return np.array(selected, dtype=np.int64)
+
+    def bitmap(self, spec):
+        """Packed bitmap of the rows the filter spec keeps."""
+        levels = self.selected_levels(spec)
+        if not len(levels):
+            return np.zeros(self.bitmaps.shape[1], dtype=np.uint8)
+        return np.bitwise_or.reduce(self.bitmaps[levels], axis=0)
+
+
+class DatasetIndex:
+    """Columnar copy of one dataset CSV, queried without re-parsing it."""
+
+    def __init__(self, frame):
+        self.n_rows = len(frame)
+        self.columns = {name: Column(name, frame[name].to_numpy()) for name in frame.columns}
+        # Python copies of the cells, so row pages are plain list lookups
+        self._cells = {name: frame[name].tolist() for name in frame.columns}
+
+    @classmethod
+    def from_csv(cls, body):
+        """Build the index from the raw bytes of a semicolon-separated CSV."""
+        import pandas as pd
+
+        return cls(pd.read_csv(io.BytesIO(body), sep=';'))
+
+    def _column(self, name, purpose):
+        column = self.columns.get(name)
+        if column is None:
+            raise ValueError(f"Unknown {purpose} column '{name}'")
+        return column
+
+    def _numeric(self, name, purpose):
+        column = self._column(name, purpose)
+        if not column.numeric:
+            raise ValueError(f"{purpose.capitalize()} column '{name}' is not numeric")
+        return column
+
+    def match(self, filters):
+        """
+        Indices of the rows every filter keeps.
+
+        Args:
+            filters: ``{column: spec}`` pairs, as in the query parameters
+        """
+        bits = None
+        for name, spec in filters.items():
+            column_bits = self._column(name, 'filter').bitmap(spec)
+            bits = column_bits if bits is None else bits & column_bits
+        if bits is None:
+            return np.arange(self.n_rows)
+        return np.flatnonzero(np.unpackbits(bits, count=self.n_rows))
+
+    def rows(self, rows, columns=None, order_by=None, offset=0, limit=DEFAULT_PAGE_SIZE):
+        """A page of the matched rows as dicts, optionally sorted by one column."""
+        names = columns or list(self.columns)
+        for name in names:
+            self._column(name, 'output')
+        if order_by:
+            descending = order_by.startswith('-')
+            codes = self._column(order_by.lstrip('-'), 'order_by').codes[rows]
+            rows = rows[np.argsort(-codes if descending else codes, kind='stable')]
+
+        page = rows[offset:offset + limit].tolist()
+        cells = [self._cells[name] for name in names]
+        return [
+            dict(zip(names, values))
+            for values in zip(*([column[i] for i in page] for column in cells))
+        ] if page else []
+
+    def aggregate(self, rows, group_by=(), aggregates=(), histograms=()):
+        """
+        Aggregates and histograms of the matched rows, per group.
+
+        Args:
+            rows: Matched row indices
+            group_by: Columns whose value combinations form the groups
+            aggregates: ``(function, column)`` pairs; ``('count', None)`` counts rows
+            histograms: Columns to count per distinct value
+
+        Returns:
+            Tuple of (groups as dicts of keys, ``count`` and ``<function>_<column>``
+            / ``histogram_<column>`` entries, ``{column: histogram bin values}``)
+        """
+        keys = [self._column(name, 'group_by') for name in group_by]
+        measured = [(function, column and self._numeric(column, function)) for function, column in aggregates]
+        binned = [self._column(name, 'histogram') for name in histograms]
+
+        if keys:
+            # Unique rows of the code matrix rather than one combined integer
+            # key, which could overflow for many high-cardinality columns
+            codes = np.stack([column.codes[rows] for column in keys], axis=1)
+            groups, inverse = np.unique(codes, axis=0, return_inverse=True)
+        else:
+            # One group holding every matched row, present even when empty
+            groups, inverse = np.zeros((1, 0), dtype=np.int64), np.zeros(len(rows), dtype=np.int64)
+        inverse = inverse.reshape(-1)
+        n_groups = len(groups)
+        counts = np.bincount(inverse, minlength=n_groups)
+
+        results = [{} for _ in range(n_groups)]
+        for position, column in enumerate(keys):
+            for result, value in zip(results, column.levels[groups[:, position]].tolist()):
+                result[column.name] = value
+        for result, count in zip(results, counts.tolist()):
+            result['count'] = count
+
+        if any(column is not None and function != 'count' for function, column in measured) and len(rows):
+            order = np.argsort(inverse, kind='stable')
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        for function, column in measured:
+            if function == 'count':
+                continue
+            values = column.values[rows]
+            if function in ('sum', 'mean', 'std'):
+                sums = np.bincount(inverse, weights=values, minlength=n_groups)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    means = sums / counts
+                    if function == 'std':
+                        squares = np.bincount(inverse, weights=values * values, minlength=n_groups)
+                        result_values = np.sqrt(np.maximum(squares / counts - means * means, 0))
+                    else:
+                        result_values = sums if function == 'sum' else means
+            elif len(rows):
+                reduce = np.minimum if function == 'min' else np.maximum
+                result_values = reduce.reduceat(values[order], starts)
+            else:
+                result_values = np.full(n_groups, np.nan)
+            if result_values.dtype.kind == 'f':
+                result_values = np.round(result_values, 4) + 0.0
+            for result, value, count in zip(results, result_values.tolist(), counts.tolist()):
+                result[f'{function}_{column.name}'] = value if count else None
+
+        bins = {}
+        for column in binned:
+            n_levels = len(column.levels)
+            table = np.bincount(
+                inverse * n_levels + column.codes[rows], minlength=n_groups * n_levels
+            ).reshape(n_groups, n_levels)
+            bins[column.name] = column.levels.tolist()
+            for result, histogram in zip(results, table.tolist()):
+                result[f'histogram_{column.name}'] = histogram
+        return results, bins
+
+    def query(self, params):
+        """
+        Run a query given as request parameters (see the module docstring).
+
+        Returns:
+            Response body: ``matched`` plus either ``groups`` and ``bins`` or
+            a ``rows`` page with ``offset``, ``limit`` and ``next_offset``
+
+        Raises:
+            ValueError: For unknown columns, functions or malformed values
+        """
+        filters = {name: params[name] for name in params if name not in RESERVED_PARAMS}
+        rows = self.match(filters)
+        body = {'matched': len(rows)}
+
+        group_by = _names(params.get('group_by'))
+        histograms = _names(params.get('histogram'))
+        aggregates = []
+        for item in _names(params.get('agg')):
+            function, _, column = item.partition(':')
+            if function not in AGGREGATES:
+                raise ValueError(f"Unknown aggregate '{function}'; expected one of {', '.join(AGGREGATES)}")
+            if function != 'count' and not column:
+                raise ValueError(f"Aggregate '{function}' needs a column, e.g. {function}:G3")
+            aggregates.append((function, column or None))
+
+        if group_by or aggregates or histograms:
+            body['groups'], body['bins'] = self.aggregate(rows, group_by, aggregates, histograms)
+            return body
+
+        try:
+            offset = max(int(params.get('offset', 0)), 0)
+            limit = min(max(int(params.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        except ValueError:
+            raise ValueError('offset and limit must be integers')
+        body['offset'] = offset
+        body['limit'] = limit
+        body['next_offset'] = offset + limit if offset + limit < len(rows) else None
+        body['rows'] = self.rows(
+            rows, _names(params.get('columns')), params.get('order_by'), offset, limit
+        )
+        return body
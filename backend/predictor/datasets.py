@@ -0,0 +1,332 @@
+"""
+Dataset downloads served from memory with validators, byte ranges and
+precompressed variants.
+
+The student CSVs are small and change only when someone replaces them, so
+each one is read once, hashed into a strong ETag and compressed once per
+content hash, with gzip and with brotli. ``brotli`` is in requirements.txt;
+without it only the gzip variant is served. A request costs one ``stat``
+to notice a replaced file; the response is then a 304, a byte range or the
+best encoding the client accepts, without touching the disk again. Queries
+run against a columnar index of the same bytes (see dataset_index).
+"""
+import gzip
+import hashlib
+import os
+import threading
+
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+
+from .dataset_index import DatasetIndex
+from .metadata import RenderedJSON
+from .ml_model.subjects import SUBJECTS
+
+try:
+    import brotli
+except ImportError:  # installed from requirements.txt; gzip alone still works
+    brotli = None
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data')
+
+# Only these files are served; anything else under data/ is not exposed
+DATASET_SUBJECTS = {filename: subject for subject, filename in SUBJECTS.items()}
+
+# Datasets change without a deploy, so clients revalidate (cheap with the ETag)
+DATASET_CACHE_CONTROL = 'no-cache'
+MANIFEST_CACHE_CONTROL = 'no-cache'
+
+# Content codings in order of preference, with their compressors
+ENCODINGS = {'gzip': lambda body: gzip.compress(body, compresslevel=9, mtime=0)}
+if brotli is not None:
+    ENCODINGS = {'br': lambda body: brotli.compress(body, quality=11), **ENCODINGS}
+
+
+class RangeNotSatisfiable(Exception):
+    """The Range header asks for bytes outside the representation."""
+
+
+def accepted_encodings(accept_encoding):
+    """
+    Content codings an Accept-Encoding header allows, as ``{coding: q}``.
+
+    ``*`` stands for every coding not listed; ``q=0`` refuses a coding.
+    """
+    accepted = {}
+    for item in (accept_encoding or '').split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def parse_range(header, size):
+    """
+    The single byte range a Range header asks for.
+
+    Returns:
+        ``(start, end)`` with ``end`` inclusive, or None when the header
+        should be ignored and the full body sent (absent, malformed, not
+        bytes, or several ranges)
+
+    Raises:
+        RangeNotSatisfiable: If the range starts past the end of the body
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, sep, last = spec.strip().partition('-')
+    if not sep or not (first + last).isdigit():
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    return start, min(end, size - 1)
+
+
+class Representation:
+    """One encoding of a dataset file: its bytes and strong ETag."""
+
+    __slots__ = ('body', 'etag', 'encoding')
+
+    def __init__(self, body, etag, encoding=None):
+        self.body = body
+        self.etag = etag
+        self.encoding = encoding
+
+
+class DatasetFile:
+    """A dataset read into memory with its hash and compressed variants."""
+
+    __slots__ = ('name', 'subject', 'path', 'stat_key', 'size', 'records', 'sha256',
+                 'last_modified', 'representations')
+
+    def __init__(self, name, path, stat, body, variants):
+        self.name = name
+        self.subject = DATASET_SUBJECTS[name]
+        self.path = path
+        self.stat_key = (stat.st_mtime_ns, stat.st_size)
+        self.size = len(body)
+        # Data rows, not counting the header line
+        self.records = max(len(body.splitlines()) - 1, 0)
+        self.sha256 = hashlib.sha256(body).hexdigest()
+        # HTTP dates have one-second resolution
+        self.last_modified = int(stat.st_mtime)
+        etag = self.sha256[:32]
+        self.representations = {None: Representation(body, f'"{etag}"')}
+        for encoding, compressed in variants(self.sha256, body).items():
+            self.representations[encoding] = Representation(compressed, f'"{etag}-{encoding}"', encoding)
+
+    @property
+    def encodings(self):
+        """Compressed sizes of the variants, by content coding."""
+        return {encoding: len(rep.body) for encoding, rep in self.representations.items() if encoding}
+
+    def select(self, accept_encoding):
+        """The representation to send for an Accept-Encoding header."""
+        accepted = accepted_encodings(accept_encoding)
+        wildcard = accepted.get('*', 0.0)
+        best, best_q = self.representations[None], 0.0
+        for encoding, rep in self.representations.items():
+            if encoding is None:
+                continue
+            q = accepted.get(encoding, wildcard)
+            if q > best_q:
+                best, best_q = rep, q
+        return best
+
+    def manifest_entry(self):
+        return {
+            'name': self.name,
+            'subject': self.subject,
+            'size': self.size,
+            'records': self.records,
+            'sha256': self.sha256,
+            'last_modified': http_date(self.last_modified),
+            'encodings': self.encodings,
+        }
+
+    def respond(self, request):
+        """
+        Serve the file for a GET or HEAD request.
+
+        Returns a 304 when If-None-Match/If-Modified-Since already cover the
+        selected representation, a 206 for a satisfiable single byte range
+        (unless If-Range no longer matches), a 416 for an unsatisfiable one,
+        and otherwise a 200 with the full body.
+        """
+        rep = self.select(request.headers.get('Accept-Encoding'))
+        response = get_conditional_response(request, etag=rep.etag, last_modified=self.last_modified)
+        if response is None:
+            response = self._body_response(request, rep)
+
+        response['ETag'] = rep.etag
+        response['Last-Modified'] = http_date(self.last_modified)
+        response['Cache-Control'] = DATASET_CACHE_CONTROL
+        response['Accept-Ranges'] = 'bytes'
+        if rep.encoding and response.status_code in (200, 206):
+            response['Content-Encoding'] = rep.encoding
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    def _if_range_matches(self, if_range, rep):
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith(('"', 'W/')):
+            # If-Range uses the strong comparison, which never matches weak tags
+            return if_range == rep.etag
+        return parse_http_date_safe(if_range) == self.last_modified
+
+    def _body_response(self, request, rep):
+        size = len(rep.body)
+        byte_range = None
+        if self._if_range_matches(request.headers.get('If-Range'), rep):
+            try:
+                byte_range = parse_range(request.headers.get('Range'), size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+
+        if byte_range is None:
+            start, end, status = 0, size - 1, 200
+        else:
+            (start, end), status = byte_range, 206
+
+        body = b'' if request.method == 'HEAD' else rep.body[start:end + 1]
+        response = HttpResponse(body, content_type='text/csv', status=status)
+        response['Content-Length'] = end - start + 1
+        response['Content-Disposition'] = f'attachment; filename="{self.name}"'
+        if status == 206:
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        return response
+
+
+class DatasetStore:
+    """
+    The served datasets, reloaded when a file's mtime or size changes.
+
+    Compressed variants and query indexes are kept per content hash, so
+    touching a file or replacing it with identical bytes does not compress
+    or index it again.
+    """
+
+    def __init__(self, data_dir=DATA_DIR, filenames=tuple(DATASET_SUBJECTS)):
+        self.data_dir = data_dir
+        self.filenames = filenames
+        self.compressions = 0
+        self.index_builds = 0
+        self._files = {}
+        self._variants = {}
+        self._indexes = {}
+        self._manifest = None
+        self._lock = threading.Lock()
+
+    def _variants_for(self, sha256, body):
+        variants = self._variants.get(sha256)
+        if variants is None:
+            variants = {}
+            for encoding, compress in ENCODINGS.items():
+                compressed = compress(body)
+                self.compressions += 1
+                # Not worth a variant if it does not save anything
+                if len(compressed) < len(body):
+                    variants[encoding] = compressed
+            self._variants[sha256] = variants
+        return variants
+
+    def get(self, name):
+        """
+        The current in-memory copy of a dataset.
+
+        Returns:
+            DatasetFile, or None if ``name`` is not a served dataset
+
+        Raises:
+            FileNotFoundError: If the dataset file is missing
+        """
+        if name not in self.filenames:
+            return None
+        path = os.path.join(self.data_dir, name)
+        stat = os.stat(path)
+        entry = self._files.get(name)
+        if entry is not None and entry.stat_key == (stat.st_mtime_ns, stat.st_size):
+            return entry
+        with self._lock:
+            entry = self._files.get(name)
+            if entry is None or entry.stat_key != (stat.st_mtime_ns, stat.st_size):
+                with open(path, 'rb') as f:
+                    stat = os.fstat(f.fileno())
+                    body = f.read()
+                entry = DatasetFile(name, path, stat, body, self._variants_for)
+                self._files[name] = entry
+                live = {dataset.sha256 for dataset in self._files.values()}
+                for cache in (self._variants, self._indexes):
+                    for sha256 in set(cache) - live:
+                        del cache[sha256]
+        return entry
+
+    def index(self, dataset):
+        """The columnar query index of a dataset, built once per content hash."""
+        index = self._indexes.get(dataset.sha256)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(dataset.sha256)
+                if index is None:
+                    index = DatasetIndex.from_csv(dataset.representations[None].body)
+                    self.index_builds += 1
+                    self._indexes[dataset.sha256] = index
+        return index
+
+    def available(self):
+        """Every served dataset that exists on disk."""
+        datasets = []
+        for name in self.filenames:
+            try:
+                datasets.append(self.get(name))
+            except FileNotFoundError:
+                continue
+        return datasets
+
+    def warm_up(self):
+        """Load and index every available dataset ahead of the first query."""
+        for dataset in self.available():
+            self.index(dataset)
+
+    def manifest(self):
+        """Rendered listing of the available datasets, rebuilt when one changes."""
+        datasets = self.available()
+        key = tuple((dataset.name, dataset.sha256, dataset.last_modified) for dataset in datasets)
+        entry = self._manifest
+        if entry is None or entry.key != key:
+            entry = self._manifest = RenderedJSON(
+                key, {'datasets': [dataset.manifest_entry() for dataset in datasets]},
+                MANIFEST_CACHE_CONTROL,
+            )
+        return entry
+
+
+dataset_store = DatasetStore()
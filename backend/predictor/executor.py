@@ -0,0 +1,78 @@
+"""
+Bounded worker pool for CPU-bound work started from async views.
+
+Validation and scoring are plain Python/numpy calls; running them on the
+event loop would stall every other connection, so the async views hand them
+to a small thread pool instead. numpy releases the GIL while scoring, and the
+per-request work is far too small to pay for pickling into a process pool.
+
+The pool admits at most ``max_workers + max_queue`` jobs. Beyond that
+``run()`` raises ExecutorBusy straight away, and the view answers 503,
+rather than letting latency grow without bound.
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+class ExecutorBusy(Exception):
+    """Raised when the executor's queue is full."""
+
+
+class BoundedExecutor:
+    """Thread pool with an admission limit, awaited from async code."""
+
+    def __init__(self, max_workers, max_queue):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.rejected = 0
+        self._pending = 0
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        # Threads do not survive a fork, so a forked worker builds its own pool
+        if self._pool is None or self._pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pid != os.getpid():
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix='predictor-cpu'
+                    )
+                    self._pid = os.getpid()
+                    self._pending = 0
+        return self._pool
+
+    def pending(self):
+        """Jobs running or waiting for a worker."""
+        return self._pending
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run ``func(*args, **kwargs)`` on the pool and await its result.
+
+        Raises:
+            ExecutorBusy: If ``max_workers + max_queue`` jobs are already admitted
+        """
+        pool = self._get_pool()
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorBusy()
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(pool, functools.partial(func, *args, **kwargs))
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+
+cpu_executor = BoundedExecutor(
+    max_workers=getattr(settings, 'PREDICTOR_ASYNC_WORKERS', None) or os.cpu_count() or 1,
+    max_queue=getattr(settings, 'PREDICTOR_ASYNC_MAX_QUEUE', 64),
+)
@@ -0,0 +1,205 @@
+"""
+Write-behind persistence for Prediction history rows.
+
+Predictions are queued in memory and written by a background thread with
+``bulk_create`` once a batch fills up or the flush interval passes, so the
+request path never waits on SQLite's single writer lock.
+
+History is therefore eventually consistent: a prediction's uuid is returned
+before its row exists, and /predictions/ can leave it out for up to
+PREDICTION_WRITE_INTERVAL. record_outcome() waits, for a bounded time,
+for a uuid still queued in this process before deciding it is unknown; a
+row queued by another worker process only shows up once that worker
+writes it.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from .models import Prediction
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class PredictionWriter:
+    """
+    Background writer that batches Prediction inserts.
+
+    ``submit`` blocks once ``max_queue`` rows are pending (backpressure); rows
+    that still do not fit after ``put_timeout`` seconds (for the whole call,
+    not per row) are written synchronously instead of being dropped.
+    """
+
+    def __init__(self, batch_size=500, flush_interval=0.5, max_queue=10000, put_timeout=1.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.put_timeout = put_timeout
+        self.written = 0
+        self.failed = 0
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._queued = set()
+        self._written_cond = threading.Condition()
+
+    def _ensure_started(self):
+        # Restart after a fork: threads do not survive into the child
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self.max_queue)
+            self._queued = set()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name='prediction-writer', daemon=True
+            )
+            self._thread.start()
+
+    def offer(self, predictions, timeout=None):
+        """
+        Queue unsaved Prediction instances, waiting at most ``timeout`` seconds in all.
+
+        Once the deadline has passed, rows are only queued if there is room
+        right away.
+
+        Returns:
+            List of the instances that did not fit and still need writing
+        """
+        self._ensure_started()
+        deadline = time.monotonic() + timeout if timeout else None
+        overflow = []
+        for prediction in predictions:
+            remaining = deadline - time.monotonic() if deadline is not None else 0
+            with self._written_cond:
+                self._queued.add(prediction.uuid)
+            try:
+                if remaining > 0:
+                    self._queue.put(prediction, timeout=remaining)
+                else:
+                    self._queue.put_nowait(prediction)
+            except queue.Full:
+                with self._written_cond:
+                    self._queued.discard(prediction.uuid)
+                overflow.append(prediction)
+        if overflow:
+            logger.warning("Prediction queue full; writing %d rows synchronously", len(overflow))
+        return overflow
+
+    def submit(self, predictions):
+        """Queue unsaved Prediction instances for writing."""
+        overflow = self.offer(predictions, self.put_timeout)
+        if overflow:
+            Prediction.objects.bulk_create(overflow)
+
+    def pending(self):
+        """Number of rows waiting to be written."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def wait_written(self, uuid, timeout):
+        """
+        Wait up to ``timeout`` seconds for a row queued in this process to be written.
+
+        Returns:
+            False if the row is still queued when the timeout passes, True
+            otherwise (including when this process never queued it)
+        """
+        if self._pid != os.getpid():
+            return True
+        with self._written_cond:
+            return self._written_cond.wait_for(lambda: uuid not in self._queued, timeout)
+
+    def close(self):
+        """Write out everything still queued and stop the thread."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        try:
+            stopping = False
+            while not stopping:
+                batch = []
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if item is _STOP:
+                        stopping = True
+                        self._queue.task_done()
+                        break
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                if batch:
+                    self._write(batch)
+        finally:
+            connection.close()
+
+    def _write(self, batch):
+        close_old_connections()
+        try:
+            Prediction.objects.bulk_create(batch)
+            self.written += len(batch)
+        except Exception:
+            self.failed += len(batch)
+            logger.exception("Failed to write %d predictions", len(batch))
+        finally:
+            with self._written_cond:
+                self._queued.difference_update(prediction.uuid for prediction in batch)
+                self._written_cond.notify_all()
+            for _ in batch:
+                self._queue.task_done()
+
+
+history_writer = PredictionWriter(
+    batch_size=getattr(settings, 'PREDICTION_WRITE_BATCH_SIZE', 500),
+    flush_interval=getattr(settings, 'PREDICTION_WRITE_INTERVAL', 0.5),
+    max_queue=getattr(settings, 'PREDICTION_WRITE_MAX_QUEUE', 10000),
+)
+atexit.register(history_writer.close)
+
+
+def record_predictions(predictions):
+    """
+    Persist Prediction instances, behind the request when write-behind is on.
+
+    Instances must carry their own ``uuid`` and ``created_at`` so callers can
+    return them before the row exists.
+    """
+    if getattr(settings, 'PREDICTION_WRITE_BEHIND', False):
+        history_writer.submit(predictions)
+    else:
+        Prediction.objects.bulk_create(predictions)
+
+
+async def arecord_predictions(predictions):
+    """
+    Async counterpart of record_predictions for the ASGI views.
+
+    The queue is never waited on from the event loop; rows that do not fit
+    are inserted with the async ORM instead.
+    """
+    if getattr(settings, 'PREDICTION_WRITE_BEHIND', False):
+        predictions = history_writer.offer(predictions)
+    if predictions:
+        await Prediction.objects.abulk_create(predictions)
@@ -0,0 +1,52 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from predictor.ml_model.streaming import OUTPUT_FORMATS, stream_scores
+from predictor.ml_model.subjects import DEFAULT_SUBJECT, SUBJECTS
+from predictor.serializers import get_student_defaults
+
+
+class Command(BaseCommand):
+    help = 'Score a semicolon-separated roster file (like data/student-mat.csv) in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='Path to the roster CSV file')
+        parser.add_argument(
+            '-o', '--output',
+            help='Write results to this file instead of stdout',
+        )
+        parser.add_argument(
+            '--format', choices=OUTPUT_FORMATS, default='csv',
+            help='Output format (default: csv)',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int,
+            default=settings.PREDICT_STREAM_CHUNK_SIZE,
+            help='Number of rows read and scored at a time',
+        )
+        parser.add_argument(
+            '--subject', choices=SUBJECTS, default=DEFAULT_SUBJECT,
+            help=f'Subject whose model scores the roster (default: {DEFAULT_SUBJECT})',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be a positive integer')
+
+        output = open(options['output'], 'w') if options['output'] else sys.stdout
+        try:
+            for block in stream_scores(
+                options['input'],
+                output_format=options['format'],
+                chunk_size=options['chunk_size'],
+                defaults=get_student_defaults(),
+                subject=options['subject'],
+            ):
+                output.write(block)
+        except (FileNotFoundError, ValueError) as e:
+            raise CommandError(str(e))
+        finally:
+            if output is not sys.stdout:
+                output.close()
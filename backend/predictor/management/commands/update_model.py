@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from predictor.ml_model.subjects import DEFAULT_SUBJECT, SUBJECTS
+from predictor.ml_model.train_model import apply_online_update, rollback_model
+from predictor.models import Prediction
+
+
+class Command(BaseCommand):
+    help = 'Fold confirmed final grades into the linear model, or roll back the last update'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rollback', action='store_true',
+            help='Restore the model version from before the last update',
+        )
+        parser.add_argument(
+            '--min-outcomes', type=int, default=1,
+            help='Do nothing unless at least this many new outcomes are waiting',
+        )
+        parser.add_argument(
+            '--subject', choices=SUBJECTS, default=DEFAULT_SUBJECT,
+            help=f'Subject whose model to update (default: {DEFAULT_SUBJECT})',
+        )
+
+    def handle(self, *args, **options):
+        subject = options['subject']
+        if options['rollback']:
+            return self.rollback(subject)
+
+        pending = list(
+            Prediction.objects
+            .filter(subject=subject, actual_grade__isnull=False, applied_version='')
+            .order_by('id')
+            .values_list('id', 'input_data', 'actual_grade')
+        )
+        if len(pending) < max(options['min_outcomes'], 1):
+            self.stdout.write(f'{len(pending)} new outcome(s) waiting; nothing to do.')
+            return
+
+        ids, rows, grades = zip(*pending)
+        try:
+            previous, version = apply_online_update(list(rows), list(grades), subject)
+        except (FileNotFoundError, ValueError) as e:
+            raise CommandError(str(e))
+
+        Prediction.objects.filter(id__in=ids).update(applied_version=version)
+        self.stdout.write(self.style.SUCCESS(
+            f'Folded {len(ids)} outcome(s) into the {subject} model: {previous} -> {version}'
+        ))
+
+    def rollback(self, subject):
+        try:
+            current, restored = rollback_model(subject)
+        except LookupError as e:
+            raise CommandError(str(e))
+
+        # Outcomes from the undone update go back in the queue
+        count = (
+            Prediction.objects
+            .filter(subject=subject, applied_version=current)
+            .update(applied_version='')
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Rolled back {current} -> {restored}; {count} outcome(s) will be re-applied next update'
+        ))
@@ -0,0 +1,139 @@
+"""
+Pre-rendered responses for the read-only metadata endpoints.
+
+The frontend fetches feature options and model info on every page load, and
+neither changes between model versions. Each body is rendered to JSON bytes
+once, hashed into a strong ETag and served as-is; a matching If-None-Match
+gets a 304 before anything else is done.
+"""
+import hashlib
+import threading
+
+from django.http import HttpResponse, HttpResponseNotModified
+from rest_framework.renderers import JSONRenderer
+
+from .choices import feature_options
+from .ml_model.predictor import get_active_model, get_cohort_index, get_model_info, get_subject_stats
+from .ml_model.subjects import DEFAULT_SUBJECT
+
+# Feature options only change with a deploy; model info changes on reload,
+# so clients revalidate it every time (cheap with the ETag)
+FEATURE_OPTIONS_CACHE_CONTROL = 'public, max-age=3600'
+MODEL_INFO_CACHE_CONTROL = 'no-cache'
+COHORT_STATS_CACHE_CONTROL = 'no-cache'
+
+
+class RenderedJSON:
+    """JSON body rendered once, with its strong ETag."""
+
+    __slots__ = ('key', 'body', 'etag', 'cache_control')
+
+    def __init__(self, key, data, cache_control):
+        self.key = key
+        self.body = JSONRenderer().render(data)
+        self.etag = '"%s"' % hashlib.sha256(self.body).hexdigest()[:32]
+        self.cache_control = cache_control
+
+    def matches(self, if_none_match):
+        """Whether an If-None-Match header value covers this body."""
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            # If-None-Match uses the weak comparison
+            if tag == '*' or tag.removeprefix('W/') == self.etag:
+                return True
+        return False
+
+    def respond(self, request):
+        """A 200 with the body, or a 304 when the client already has it."""
+        if self.matches(request.headers.get('If-None-Match')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(self.body, content_type='application/json')
+        response['ETag'] = self.etag
+        response['Cache-Control'] = self.cache_control
+        return response
+
+
+def model_info_payload(active=None, subject=DEFAULT_SUBJECT, subject_stats=None):
+    """
+    Response body for the model-info endpoint.
+
+    ``subjects`` lists every subject the predictor serves and which of them
+    currently have a model in memory.
+
+    Raises:
+        FileNotFoundError: If the subject has no trained model
+    """
+    info = get_model_info(active, subject)
+    return {
+        'subject': subject,
+        'model_type': info['model_type'],
+        'model_version': info['version'],
+        'metrics': {
+            'mean_squared_error': round(info['mse'], 4),
+            'r2_score': round(info['r2'], 4),
+        },
+        'dataset': {
+            'train_samples': info['train_size'],
+            'test_samples': info['test_size'],
+        },
+        'subjects': get_subject_stats() if subject_stats is None else subject_stats,
+    }
+
+
+class MetadataResponses:
+    """Holds the rendered metadata bodies, rebuilding model info per version."""
+
+    def __init__(self):
+        self._feature_options = None
+        self._model_info = {}
+        self._cohort_stats = {}
+        self._lock = threading.Lock()
+
+    def feature_options(self):
+        entry = self._feature_options
+        if entry is None:
+            entry = self._feature_options = RenderedJSON(
+                None, feature_options(), FEATURE_OPTIONS_CACHE_CONTROL
+            )
+        return entry
+
+    def model_info(self, subject=DEFAULT_SUBJECT):
+        """
+        Rendered model info for the subject's active version.
+
+        Raises:
+            FileNotFoundError: If the subject has no trained model
+        """
+        active = get_active_model(subject)
+        subject_stats = get_subject_stats()
+        # Re-rendered when this model or the set of loaded subjects changes
+        key = (active.version,) + tuple(
+            stats.get('model_version') for stats in subject_stats.values()
+        )
+        entry = self._model_info.get(subject)
+        if entry is None or entry.key != key:
+            with self._lock:
+                entry = self._model_info.get(subject)
+                if entry is None or entry.key != key:
+                    entry = self._model_info[subject] = RenderedJSON(
+                        key, model_info_payload(active, subject, subject_stats), MODEL_INFO_CACHE_CONTROL
+                    )
+        return entry
+
+    def cohort_stats(self, subject=DEFAULT_SUBJECT):
+        """Rendered cohort tables for the subject's current index, or None without one."""
+        index = get_cohort_index(subject)
+        if index is None:
+            return None
+        entry = self._cohort_stats.get(subject)
+        if entry is None or entry.key != index.digest:
+            entry = self._cohort_stats[subject] = RenderedJSON(
+                index.digest, index.stats(), COHORT_STATS_CACHE_CONTROL
+            )
+        return entry
+
+
+metadata_responses = MetadataResponses()
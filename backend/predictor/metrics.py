@@ -0,0 +1,197 @@
+"""
+In-process request and hot-path stage metrics, rendered as Prometheus text.
+
+Timers are plain perf_counter pairs feeding fixed-bucket histograms. When
+PREDICTOR_METRICS_ENABLED is off, ``stage()`` hands back a shared no-op
+context manager and the middleware returns straight away.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+# Seconds; tuned for sub-millisecond stages up to multi-second uploads
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+_NOOP = nullcontext()
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    __slots__ = ('buckets', 'counts', 'total', 'count', '_lock')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += value
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.total, self.count
+
+
+class _StageTimer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    """Holds every counter and histogram the predictor app exports."""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.requests = {}
+        self.request_durations = {}
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, table, key):
+        histogram = table.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = table.setdefault(key, Histogram())
+        return histogram
+
+    def stage(self, name):
+        """Context manager timing one hot-path stage (no-op when disabled)."""
+        if not self.enabled:
+            return _NOOP
+        return _StageTimer(self._histogram(self.stages, name))
+
+    def observe_request(self, method, endpoint, status_code, duration):
+        key = (method, endpoint, str(status_code))
+        with self._lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+        self._histogram(self.request_durations, endpoint).observe(duration)
+
+    def render(self, extra=()):
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Args:
+            extra: Iterable of (name, type, help, [(labels dict, value)])
+                   families gathered from other components at scrape time
+        """
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        family('predictor_requests_total', 'counter', 'HTTP requests handled by the API.')
+        with self._lock:
+            requests = sorted(self.requests.items())
+        for (method, endpoint, status_code), value in requests:
+            labels = _labels({'method': method, 'endpoint': endpoint, 'status': status_code})
+            lines.append(f'predictor_requests_total{labels} {value}')
+
+        family('predictor_request_duration_seconds', 'histogram', 'End-to-end API request latency.')
+        for endpoint, histogram in sorted(self.request_durations.items()):
+            _render_histogram(lines, 'predictor_request_duration_seconds', {'endpoint': endpoint}, histogram)
+
+        family('predictor_stage_duration_seconds', 'histogram', 'Latency of hot-path stages.')
+        for stage, histogram in sorted(self.stages.items()):
+            _render_histogram(lines, 'predictor_stage_duration_seconds', {'stage': stage}, histogram)
+
+        for name, kind, help_text, samples in extra:
+            family(name, kind, help_text)
+            for labels, value in samples:
+                lines.append(f'{name}{_labels(labels)} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _render_histogram(lines, name, labels, histogram):
+    counts, total, count = histogram.snapshot()
+    cumulative = 0
+    for bound, bucket_count in zip(histogram.buckets, counts):
+        cumulative += bucket_count
+        lines.append(f'{name}_bucket{_labels(dict(labels, le=repr(bound)))} {cumulative}')
+    lines.append(f'{name}_bucket{_labels(dict(labels, le="+Inf"))} {count}')
+    lines.append(f'{name}_sum{_labels(labels)} {total!r}')
+    lines.append(f'{name}_count{_labels(labels)} {count}')
+
+
+metrics = MetricsRegistry(enabled=getattr(settings, 'PREDICTOR_METRICS_ENABLED', True))
+
+
+def stage(name):
+    """Time a hot-path stage: ``with stage('validate'): ...``."""
+    return metrics.stage(name)
+
+
+class MetricsMiddleware:
+    """Count API requests and time them end to end, labelled by URL name."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Stay async under ASGI so async views are not pushed onto a thread
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not metrics.enabled:
+            return self.get_response(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self._observe(request, response, start)
+        return response
+
+    async def __acall__(self, request):
+        if not metrics.enabled:
+            return await self.get_response(request)
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self._observe(request, response, start)
+        return response
+
+    @staticmethod
+    def _observe(request, response, start):
+        match = request.resolver_match
+        if match is not None and match.url_name:
+            metrics.observe_request(
+                request.method, match.url_name, response.status_code,
+                time.perf_counter() - start
+            )
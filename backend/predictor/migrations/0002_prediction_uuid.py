@@ -0,0 +1,36 @@
+import uuid
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def populate_uuids(apps, schema_editor):
+    Prediction = apps.get_model('predictor', 'Prediction')
+    for prediction in Prediction.objects.only('id').iterator():
+        Prediction.objects.filter(pk=prediction.pk).update(uuid=uuid.uuid4())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prediction',
+            name='uuid',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.RunPython(populate_uuids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='prediction',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='prediction',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
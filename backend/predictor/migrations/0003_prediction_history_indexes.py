@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:50
+
+from django.db import migrations, models
+
+
+def backfill_denormalized(apps, schema_editor):
+    Prediction = apps.get_model('predictor', 'Prediction')
+    batch = []
+    for prediction in Prediction.objects.iterator():
+        grade = prediction.predicted_grade
+        prediction.school = (prediction.input_data or {}).get('school', '')
+        prediction.grade_band = (
+            'excellent' if grade >= 16 else
+            'good' if grade >= 12 else
+            'average' if grade >= 10 else
+            'poor'
+        )
+        batch.append(prediction)
+        if len(batch) >= 1000:
+            Prediction.objects.bulk_update(batch, ['school', 'grade_band'])
+            batch = []
+    if batch:
+        Prediction.objects.bulk_update(batch, ['school', 'grade_band'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0002_prediction_uuid'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='prediction',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddField(
+            model_name='prediction',
+            name='grade_band',
+            field=models.CharField(blank=True, default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='prediction',
+            name='school',
+            field=models.CharField(blank=True, default='', max_length=2),
+        ),
+        migrations.RunPython(backfill_denormalized, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='prediction',
+            index=models.Index(fields=['created_at', 'id'], name='prediction_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prediction',
+            index=models.Index(fields=['school', 'created_at', 'id'], name='prediction_school_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prediction',
+            index=models.Index(fields=['grade_band', 'created_at', 'id'], name='prediction_band_idx'),
+        ),
+    ]
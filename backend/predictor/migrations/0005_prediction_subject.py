@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0004_prediction_outcome'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prediction',
+            name='subject',
+            field=models.CharField(default='mat', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='prediction',
+            index=models.Index(fields=['subject', 'created_at', 'id'], name='prediction_subject_idx'),
+        ),
+    ]
@@ -0,0 +1,186 @@
+"""
+Precomputed grade distribution of the training cohort.
+
+At training time every student in the dataset CSVs is scored once. The
+sorted predicted and actual (G3) grades, histograms and quantile tables are
+saved per segment (whole cohort, each school, each subject) to a compressed
+``.npz`` file. At serving time the cohort percentile of a prediction is a
+binary search over the sorted grades, and /cohort-stats/ serves the
+precomputed tables as-is.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+QUANTILES = (0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95)
+# One bin per whole grade; the last bin also holds 20
+HISTOGRAM_BINS = np.arange(0, 22)
+COLUMNS = ('predicted', 'g3')
+ALL = 'all'
+
+
+def _distribution(values):
+    counts, _ = np.histogram(values, bins=HISTOGRAM_BINS)
+    return {
+        'mean': round(float(np.mean(values)), 4),
+        'std': round(float(np.std(values)), 4),
+        'quantiles': {
+            f'p{round(q * 100)}': round(float(v), 4)
+            for q, v in zip(QUANTILES, np.quantile(values, QUANTILES))
+        },
+        'histogram': counts.tolist(),
+    }
+
+
+def build_cohort_index(active, data_dir, datasets, path):
+    """
+    Score every student in ``datasets`` and save the cohort index.
+
+    Args:
+        active: ModelVersion whose predictions the index describes
+        data_dir: Directory holding the dataset CSVs
+        datasets: CSV file names, e.g. ['student-mat.csv', 'student-por.csv']
+        path: Destination ``.npz`` file
+
+    Returns:
+        Number of students indexed
+    """
+    import pandas as pd
+
+    frames = []
+    for filename in datasets:
+        file_path = os.path.join(data_dir, filename)
+        if os.path.exists(file_path):
+            frame = pd.read_csv(file_path, sep=';')
+            frame['subject'] = os.path.splitext(filename)[0].removeprefix('student-')
+            frames.append(frame)
+    if not frames:
+        raise FileNotFoundError(f"No cohort datasets found in {data_dir}")
+    cohort = pd.concat(frames, ignore_index=True)
+
+    X = active.encoder.encode_many(cohort.to_dict('records'))
+    predicted = np.clip(active.score(X), 0, 20)
+    g3 = cohort['G3'].to_numpy(dtype=np.float64)
+
+    masks = {ALL: np.ones(len(cohort), dtype=bool)}
+    for column in ('school', 'subject'):
+        for value in sorted(cohort[column].unique()):
+            masks[f'{column}:{value}'] = (cohort[column] == value).to_numpy()
+
+    arrays = {}
+    segments = {}
+    for segment, mask in masks.items():
+        segments[segment] = {'count': int(mask.sum())}
+        for column, values in zip(COLUMNS, (predicted, g3)):
+            arrays[f'{segment}/{column}'] = np.sort(values[mask])
+            segments[segment][column] = _distribution(values[mask])
+
+    meta = {
+        'model_version': active.version,
+        'datasets': [name for name in datasets if os.path.exists(os.path.join(data_dir, name))],
+        'quantiles': list(QUANTILES),
+        'histogram_bins': HISTOGRAM_BINS.tolist(),
+        'segments': segments,
+    }
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(f, meta=np.array(json.dumps(meta)), **arrays)
+    os.replace(tmp_path, path)
+    return len(cohort)
+
+
+class CohortIndex:
+    """Sorted cohort grades for percentile lookups, plus the summary tables."""
+
+    def __init__(self, meta, arrays, digest):
+        self.meta = meta
+        self.digest = digest
+        # Plain lists: bisect on them beats numpy for single lookups
+        self._sorted = {
+            tuple(key.split('/', 1)): values.tolist()
+            for key, values in arrays.items()
+        }
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        with np.load(io.BytesIO(raw), allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            arrays = {key: data[key] for key in data.files if key != 'meta'}
+        return cls(meta, arrays, hashlib.sha256(raw).hexdigest()[:12])
+
+    def percentile(self, grade, segment=ALL, column='predicted'):
+        """
+        Percentile rank of ``grade`` within a segment, ties counted half.
+
+        Returns:
+            Percentage (0-100) rounded to one decimal, or None for an
+            unknown segment
+        """
+        values = self._sorted.get((segment, column))
+        if not values:
+            return None
+        below = bisect_left(values, grade)
+        at_or_below = bisect_right(values, grade)
+        return round(100.0 * (below + at_or_below) / 2 / len(values), 1)
+
+    def subject_percentile(self, grade, subject, column='predicted'):
+        """
+        Percentile rank of ``grade`` among students of one subject.
+
+        Falls back to the whole cohort for indexes without that subject's
+        segment.
+        """
+        percentile = self.percentile(grade, f'subject:{subject}', column)
+        if percentile is None:
+            percentile = self.percentile(grade, ALL, column)
+        return percentile
+
+    def stats(self):
+        """The precomputed summary tables."""
+        return self.meta
+
+
+class CohortIndexStore:
+    """
+    Lazily loads the cohort index and picks up a rebuilt file.
+
+    The file's mtime is checked at most once per ``check_interval`` seconds
+    (only on first use when it is 0), so lookups normally touch no
+    filesystem at all.
+    """
+
+    def __init__(self, path, check_interval=5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._index = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return the current CohortIndex, or None if none has been built."""
+        now = time.monotonic()
+        if self._checked_at and (
+            self.check_interval <= 0 or now - self._checked_at < self.check_interval
+        ):
+            return self._index
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                self._index = self._mtime = None
+                return None
+            if mtime != self._mtime:
+                self._index = CohortIndex.load(self.path)
+                self._mtime = mtime
+            return self._index
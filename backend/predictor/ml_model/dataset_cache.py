@@ -0,0 +1,86 @@
+"""
+On-disk cache of encoded training datasets.
+
+Parsing the semicolon-separated CSVs and one-hot encoding them is repeated by
+every training run. The encoded matrix, target and feature names are stored
+as ``.npy``/``.json`` files keyed by a hash of the source CSV and the encoding
+spec, and memory-mapped on later runs. A changed CSV or spec produces a new
+key, and the stale entries for that dataset are removed.
+"""
+import glob
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# Bump when the encoding logic changes in a way the spec does not capture
+CACHE_FORMAT = 1
+
+
+def _cache_key(csv_path, spec):
+    digest = hashlib.sha256()
+    with open(csv_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    digest.update(json.dumps(dict(spec, cache_format=CACHE_FORMAT), sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
+def _save_npy(path, array):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+class DatasetCache:
+    """Stores encoded datasets under ``cache_dir``."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def _paths(self, csv_path, key):
+        stem = os.path.splitext(os.path.basename(csv_path))[0]
+        base = os.path.join(self.cache_dir, f'{stem}-{key}')
+        return base + '.X.npy', base + '.y.npy', base + '.json'
+
+    def _remove_stale(self, csv_path, key):
+        stem = os.path.splitext(os.path.basename(csv_path))[0]
+        keep = set(self._paths(csv_path, key))
+        for path in glob.glob(os.path.join(self.cache_dir, f'{stem}-*')):
+            if path not in keep:
+                os.remove(path)
+
+    def load(self, csv_path, spec, encode):
+        """
+        Return the encoded dataset, computing and storing it on a miss.
+
+        Args:
+            csv_path: Source CSV file
+            spec: JSON-serializable description of the encoding
+            encode: Callable returning (X, y, feature_names) from the CSV
+
+        Returns:
+            Tuple of (read-only memory-mapped X, y, feature names)
+        """
+        key = _cache_key(csv_path, spec)
+        x_path, y_path, meta_path = self._paths(csv_path, key)
+
+        if not os.path.exists(meta_path):
+            X, y, feature_names = encode()
+            os.makedirs(self.cache_dir, exist_ok=True)
+            _save_npy(x_path, np.ascontiguousarray(X, dtype=np.float64))
+            _save_npy(y_path, np.ascontiguousarray(y, dtype=np.float64))
+            # The JSON file is written last and marks the entry complete
+            tmp_path = meta_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump({'feature_names': list(feature_names), 'spec': spec}, f)
+            os.replace(tmp_path, meta_path)
+            self._remove_stale(csv_path, key)
+
+        with open(meta_path) as f:
+            feature_names = json.load(f)['feature_names']
+        X = np.load(x_path, mmap_mode='r')
+        y = np.load(y_path, mmap_mode='r')
+        return X, y, feature_names
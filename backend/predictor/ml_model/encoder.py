@@ -0,0 +1,105 @@
+"""
+Compiled feature encoder that turns validated student data into model rows.
+"""
+import threading
+
+import numpy as np
+
+
+class FeatureEncoder:
+    """
+    Encode student feature dicts straight into NumPy rows.
+
+    Built once from the model metadata: every numeric feature gets a fixed
+    column index and every categorical value gets a lookup table entry
+    pointing at its one-hot slot, so encoding a request is a handful of dict
+    lookups and array writes instead of building a DataFrame.
+    """
+
+    def __init__(self, feature_names, categorical_columns):
+        self.feature_names = list(feature_names)
+        self.categorical_columns = list(categorical_columns)
+        self.n_features = len(self.feature_names)
+
+        # Map each categorical value (lower-cased) to its one-hot column index.
+        # The dropped baseline category has no column and is simply absent.
+        self.value_slots = {name: {} for name in self.categorical_columns}
+        encoded = set()
+        for index, column in enumerate(self.feature_names):
+            for name in self.categorical_columns:
+                prefix = name + '_'
+                if column.startswith(prefix):
+                    self.value_slots[name][column[len(prefix):].lower()] = index
+                    encoded.add(index)
+                    break
+
+        self.numeric_index = {
+            column: index
+            for index, column in enumerate(self.feature_names)
+            if index not in encoded
+        }
+
+        self._numeric_items = tuple(self.numeric_index.items())
+        self._categorical_items = tuple(
+            (name, slots) for name, slots in self.value_slots.items() if slots
+        )
+        self._local = threading.local()
+
+    @classmethod
+    def from_metadata(cls, metadata):
+        """Build an encoder from the saved model metadata."""
+        return cls(metadata['feature_names'], metadata['categorical_columns'])
+
+    def encode_into(self, input_data: dict, row) -> None:
+        """
+        Write one student's features into a zeroed row.
+
+        Args:
+            input_data: Dictionary with student features
+            row: 1-D float64 array of length ``n_features``
+        """
+        for feat, index in self._numeric_items:
+            if feat in input_data:
+                row[index] = input_data[feat]
+
+        for name, slots in self._categorical_items:
+            if name in input_data:
+                index = slots.get(str(input_data[name]).lower())
+                if index is not None:
+                    row[index] = 1
+
+    def encode(self, input_data: dict):
+        """
+        Encode a single student as a ``(1, n_features)`` matrix.
+
+        The matrix is a per-thread buffer that is reused by the next call,
+        so score it before encoding another student.
+
+        Args:
+            input_data: Dictionary with student features
+
+        Returns:
+            float64 array ready for scoring
+        """
+        X = getattr(self._local, 'row', None)
+        if X is None:
+            X = self._local.row = np.zeros((1, self.n_features), dtype=np.float64)
+        else:
+            X.fill(0)
+        self.encode_into(input_data, X[0])
+        return X
+
+    def encode_many(self, rows):
+        """
+        Encode many students into a single ``(len(rows), n_features)`` matrix.
+
+        Args:
+            rows: Sequence of dictionaries with student features
+
+        Returns:
+            float64 array ready for scoring
+        """
+        X = np.zeros((len(rows), self.n_features), dtype=np.float64)
+        for row, input_data in zip(X, rows):
+            self.encode_into(input_data, row)
+        return X
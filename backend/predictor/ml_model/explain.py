@@ -0,0 +1,94 @@
+"""
+Per-feature contributions to linear-model predictions.
+
+For a linear model the prediction is ``intercept + Σ coef_j * x_j``, so each
+term is that feature's exact signed contribution; no post-hoc explainer is
+needed. One-hot columns are summed back into the categorical feature they
+encode, and the top-k contributions per row are picked with one vectorized
+sort over the whole batch.
+"""
+import weakref
+
+import numpy as np
+
+DEFAULT_TOP_K = 5
+
+# FeatureEncoder -> (feature names, column-to-feature aggregation matrix)
+_groupings = weakref.WeakKeyDictionary()
+
+
+class ExplanationUnavailable(Exception):
+    """Raised when the active model has no per-feature contributions."""
+
+
+def feature_grouping(encoder):
+    """
+    Map encoded columns back to the original student features.
+
+    Returns:
+        Tuple of (feature names, ``(n_columns, n_features)`` 0/1 matrix)
+    """
+    grouping = _groupings.get(encoder)
+    if grouping is None:
+        names = list(encoder.numeric_index) + [
+            name for name, slots in encoder.value_slots.items() if slots
+        ]
+        position = {name: i for i, name in enumerate(names)}
+        G = np.zeros((encoder.n_features, len(names)))
+        for name, index in encoder.numeric_index.items():
+            G[index, position[name]] = 1
+        for name, slots in encoder.value_slots.items():
+            for index in slots.values():
+                G[index, position[name]] = 1
+        grouping = _groupings[encoder] = (names, G)
+    return grouping
+
+
+def explain_rows(active, X, top_k=DEFAULT_TOP_K):
+    """
+    Top-k signed feature contributions for every row of an encoded matrix.
+
+    Contributions are on the raw score, before the 0-20 clamp, so
+    ``intercept + Σ contributions + other`` is the unclamped prediction.
+
+    Args:
+        active: ModelVersion that scores ``X``
+        X: Encoded ``(n, n_features)`` matrix
+        top_k: Contributions kept per row, largest magnitude first
+
+    Returns:
+        One dict per row with ``intercept``, ``contributions`` (list of
+        {feature, contribution}) and ``other`` (sum of the rest)
+
+    Raises:
+        ExplanationUnavailable: If the active model is not linear
+    """
+    if not active.is_linear:
+        raise ExplanationUnavailable(
+            f"Explanations need a linear model; the active model is "
+            f"{active.metadata.get('model_type', 'not linear')}"
+        )
+    names, G = feature_grouping(active.encoder)
+    contributions = (X * active.model.coef_) @ G
+    top_k = max(1, min(top_k, len(names)))
+
+    order = np.argsort(-np.abs(contributions), axis=1, kind='stable')[:, :top_k]
+    top = np.take_along_axis(contributions, order, axis=1)
+    # Rounded in numpy (+ 0.0 turns -0.0 into 0.0); Python-level work is
+    # then only assembling the response dicts
+    other = np.round(contributions.sum(axis=1) - top.sum(axis=1), 4) + 0.0
+    top = np.round(top, 4) + 0.0
+    features = np.array(names, dtype=object)[order]
+    intercept = round(float(active.model.intercept_), 4)
+
+    return [
+        {
+            'intercept': intercept,
+            'contributions': [
+                {'feature': feature, 'contribution': value}
+                for feature, value in zip(row_features, values)
+            ],
+            'other': rest,
+        }
+        for row_features, values, rest in zip(features.tolist(), top.tolist(), other.tolist())
+    ]
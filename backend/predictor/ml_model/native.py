@@ -0,0 +1,94 @@
+"""
+Dependency-free native model artifact for linear models.
+
+Layout (little endian)::
+
+    8 bytes   magic b'SPMODEL1'
+    4 bytes   uint32 header length
+    N bytes   UTF-8 JSON header (feature_names, metrics, ...)
+    padding   zero bytes up to an 8-byte boundary
+    8*(F+1)   float64 coefficients followed by the intercept
+
+The coefficient block is memory-mapped, so forked workers share the same
+pages and loading needs neither sklearn nor unpickling.
+"""
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b'SPMODEL1'
+_PREFIX = struct.Struct('<8sI')
+
+
+class NativeLinearModel:
+    """Minimal stand-in for a fitted LinearRegression backed by mapped memory."""
+
+    def __init__(self, coef, intercept):
+        self.coef_ = coef
+        self.intercept_ = intercept
+        self.n_features_in_ = coef.shape[0]
+
+    def predict(self, X):
+        """Same expression LinearRegression.predict evaluates."""
+        return np.asarray(X, dtype=np.float64) @ self.coef_ + self.intercept_
+
+
+def write_native_model(path, coef, intercept, header):
+    """
+    Write a native artifact atomically.
+
+    Args:
+        path: Destination file
+        coef: 1-D array of coefficients, one per feature
+        intercept: Model intercept
+        header: JSON-serializable metadata; must include ``feature_names``
+    """
+    coef = np.ascontiguousarray(coef, dtype='<f8')
+    if coef.ndim != 1 or coef.shape[0] != len(header['feature_names']):
+        raise ValueError("Coefficient count does not match feature_names")
+
+    header_bytes = json.dumps(header, sort_keys=True).encode('utf-8')
+    prefix = _PREFIX.pack(MAGIC, len(header_bytes))
+    padding = -(len(prefix) + len(header_bytes)) % 8
+    block = np.append(coef, np.float64(intercept)).astype('<f8')
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(prefix)
+        f.write(header_bytes)
+        f.write(b'\0' * padding)
+        f.write(block.tobytes())
+    os.replace(tmp_path, path)
+
+
+def load_native_model(path):
+    """
+    Memory-map a native artifact.
+
+    Returns:
+        Tuple of (NativeLinearModel, metadata dict, sha256 of the file)
+    """
+    with open(path, 'rb') as f:
+        prefix = f.read(_PREFIX.size)
+        magic, header_len = _PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a native model artifact")
+        header_bytes = f.read(header_len)
+        metadata = json.loads(header_bytes.decode('utf-8'))
+
+        offset = _PREFIX.size + header_len
+        padding = -offset % 8
+        n_features = len(metadata['feature_names'])
+        # Map through the open handle so the header and block come from the
+        # same file even if the path is replaced meanwhile
+        block = np.memmap(f, dtype='<f8', mode='r', offset=offset + padding,
+                          shape=(n_features + 1,))
+    block = block.view(np.ndarray)
+
+    digest = hashlib.sha256(prefix + header_bytes + b'\0' * padding)
+    digest.update(block.data)
+
+    return NativeLinearModel(block[:n_features], block[n_features]), metadata, digest.hexdigest()
@@ -0,0 +1,151 @@
+"""
+Incremental refits of the linear model from confirmed final grades.
+
+Ordinary least squares only needs the sufficient statistics AᵀA and Aᵀy,
+where A is the encoded feature matrix with a leading column of ones for the
+intercept. They are kept on disk next to the model, so folding in new rows
+is a rank update and a refit is one (p+1)×(p+1) solve, however many rows
+have been seen.
+
+The held-out test split gets its own statistics, so the published MSE and
+R² remain test-set metrics without storing the rows themselves:
+SSE(β) = yᵀy - 2βᵀAᵀy + βᵀAᵀAβ.
+"""
+import os
+import shutil
+
+import numpy as np
+
+
+class SufficientStats:
+    """AᵀA, Aᵀy, yᵀy, Σy and n for one set of rows."""
+
+    def __init__(self, AtA, Aty, yty=0.0, sum_y=0.0, n=0):
+        self.AtA = np.asarray(AtA, dtype=np.float64)
+        self.Aty = np.asarray(Aty, dtype=np.float64)
+        self.yty = float(yty)
+        self.sum_y = float(sum_y)
+        self.n = int(n)
+
+    @classmethod
+    def from_rows(cls, X, y):
+        stats = cls(np.zeros((X.shape[1] + 1,) * 2), np.zeros(X.shape[1] + 1))
+        stats.add(X, y)
+        return stats
+
+    def add(self, X, y):
+        """Fold rows in; O(rows × p²)."""
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        A = np.hstack([np.ones((len(X), 1)), X])
+        self.AtA += A.T @ A
+        self.Aty += A.T @ y
+        self.yty += float(y @ y)
+        self.sum_y += float(y.sum())
+        self.n += len(y)
+
+    def solve(self):
+        """
+        Least-squares coefficients from the statistics alone.
+
+        Returns:
+            Tuple of (coef, intercept)
+        """
+        beta = np.linalg.lstsq(self.AtA, self.Aty, rcond=None)[0]
+        return beta[1:], float(beta[0])
+
+    def metrics(self, coef, intercept):
+        """
+        MSE and R² of a linear model over these rows.
+
+        Returns:
+            Tuple of (mse, r2)
+        """
+        beta = np.concatenate([[intercept], coef])
+        sse = self.yty - 2 * beta @ self.Aty + beta @ self.AtA @ beta
+        sst = self.yty - self.sum_y ** 2 / self.n
+        sse = max(float(sse), 0.0)
+        return sse / self.n, 1 - sse / sst if sst > 0 else 0.0
+
+
+def save_stats(path, feature_names, train, test):
+    """Write train and test statistics atomically to ``path`` (.npz)."""
+    arrays = {'feature_names': np.array(feature_names)}
+    for prefix, stats in (('train', train), ('test', test)):
+        arrays[f'{prefix}_AtA'] = stats.AtA
+        arrays[f'{prefix}_Aty'] = stats.Aty
+        arrays[f'{prefix}_scalars'] = np.array([stats.yty, stats.sum_y, stats.n])
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_stats(path):
+    """
+    Read statistics written by save_stats.
+
+    Returns:
+        Tuple of (feature names, train stats, test stats)
+    """
+    with np.load(path, allow_pickle=False) as data:
+        stats = []
+        for prefix in ('train', 'test'):
+            yty, sum_y, n = data[f'{prefix}_scalars']
+            stats.append(SufficientStats(data[f'{prefix}_AtA'], data[f'{prefix}_Aty'], yty, sum_y, n))
+        return data['feature_names'].tolist(), stats[0], stats[1]
+
+
+class VersionHistory:
+    """
+    Snapshots of the model artifacts, newest last, for rollback.
+
+    Each snapshot is a directory ``<seq>-<version>`` holding copies of the
+    artifact files that existed when it was taken.
+    """
+
+    def __init__(self, history_dir, artifact_paths):
+        self.history_dir = history_dir
+        self.artifact_paths = list(artifact_paths)
+
+    def snapshots(self):
+        if not os.path.isdir(self.history_dir):
+            return []
+        return sorted(os.listdir(self.history_dir))
+
+    def push(self, version):
+        """Copy the current artifacts into a new snapshot."""
+        existing = self.snapshots()
+        seq = int(existing[-1].split('-', 1)[0]) + 1 if existing else 1
+        snapshot = os.path.join(self.history_dir, f'{seq:04d}-{version}')
+        os.makedirs(snapshot)
+        for path in self.artifact_paths:
+            if os.path.exists(path):
+                shutil.copy2(path, os.path.join(snapshot, os.path.basename(path)))
+        return snapshot
+
+    def pop(self):
+        """
+        Restore the newest snapshot over the current artifacts and delete it.
+
+        Returns:
+            The version the snapshot was taken from
+
+        Raises:
+            LookupError: If there is nothing to roll back to
+        """
+        existing = self.snapshots()
+        if not existing:
+            raise LookupError("No previous model version to roll back to")
+        snapshot = os.path.join(self.history_dir, existing[-1])
+        for path in self.artifact_paths:
+            saved = os.path.join(snapshot, os.path.basename(path))
+            if os.path.exists(saved):
+                # A fresh mtime, so the registry's watcher sees the change
+                tmp_path = path + '.tmp'
+                shutil.copyfile(saved, tmp_path)
+                os.replace(tmp_path, path)
+            elif os.path.exists(path):
+                os.remove(path)
+        shutil.rmtree(snapshot)
+        return existing[-1].split('-', 1)[1]
@@ -1,107 +1,159 @@
 """
 Module to load and use the trained model for predictions.
 """
-import os
-import numpy as np
-import pandas as pd
-import joblib
+from .cohort import CohortIndexStore
+from .registry import SubjectRegistry
+from .subjects import DEFAULT_SUBJECT, SUBJECTS, subject_paths
 
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-MODEL_PATH = os.path.join(SCRIPT_DIR, 'trained_model.joblib')
-METADATA_PATH = os.path.join(SCRIPT_DIR, 'model_metadata.joblib')
 
-# Cache for loaded model and metadata
-_model = None
-_metadata = None
+def _setting(name, default):
+    """A predictor setting from Django settings when available."""
+    try:
+        from django.conf import settings
+        if settings.configured:
+            return getattr(settings, name, default)
+    except ImportError:
+        pass
+    return default
 
 
-def load_model():
+def _reload_interval():
+    """Seconds between artifact checks, from Django settings when available."""
+    return _setting('PREDICTOR_MODEL_RELOAD_INTERVAL', 0)
+
+
+# One lazily loaded model per subject, LRU-evicted under the memory budget
+subjects = SubjectRegistry(
+    SUBJECTS, subject_paths,
+    reload_interval=_reload_interval(),
+    memory_budget=int(_setting('PREDICTOR_MODEL_MEMORY_BUDGET_MB', 0) * 1024 * 1024),
+)
+
+# Cohort grade distribution built alongside each model by train_model.py
+cohort_stores = {
+    subject: CohortIndexStore(subject_paths(subject).cohort_index, check_interval=_reload_interval())
+    for subject in SUBJECTS
+}
+
+
+def get_active_model(subject=DEFAULT_SUBJECT):
+    """
+    Get the active ModelVersion (model, metadata, encoder and version).
+
+    Raises:
+        ValueError: If the subject is unknown
+        FileNotFoundError: If the subject has no trained model
+    """
+    return subjects.get(subject)
+
+
+def load_model(subject=DEFAULT_SUBJECT):
     """Load the trained model and metadata."""
-    global _model, _metadata
-    
-    if _model is None:
-        if not os.path.exists(MODEL_PATH):
-            raise FileNotFoundError(
-                "Model not found. Please run train_model.py first."
-            )
-        _model = joblib.load(MODEL_PATH)
-        _metadata = joblib.load(METADATA_PATH)
-    
-    return _model, _metadata
-
-
-def get_model_info():
-    """Get model performance metrics."""
-    _, metadata = load_model()
+    active = subjects.get(subject)
+    return active.model, active.metadata
+
+
+def reload_model(force=False, subject=DEFAULT_SUBJECT) -> bool:
+    """Swap in the artifacts on disk if they changed. Returns True on swap."""
+    return subjects.registry(subject).reload(force=force)
+
+
+def get_model_info(active=None, subject=DEFAULT_SUBJECT):
+    """
+    Get model performance metrics.
+
+    Args:
+        active: ModelVersion to describe (defaults to the subject's active one)
+        subject: Subject whose model to describe
+    """
+    if active is None:
+        active = subjects.get(subject)
+    metadata = active.metadata
     return {
         'mse': metadata['mse'],
         'r2': metadata['r2'],
         'train_size': metadata['train_size'],
         'test_size': metadata['test_size'],
+        'model_type': metadata.get('model_type', 'Linear Regression'),
+        'leaderboard': metadata.get('leaderboard', []),
+        'version': active.version,
+        'loaded_at': active.loaded_at,
     }
 
 
-def predict(input_data: dict) -> float:
+def get_subject_stats():
+    """
+    Per-subject serving state.
+
+    Every subject reports whether its model is in memory; loaded ones add
+    their version, test metrics and artifact footprint. Subjects that are
+    not loaded are not loaded just to describe them.
+    """
+    loaded = set(subjects.loaded())
+    stats = {}
+    for subject in SUBJECTS:
+        entry = {'loaded': subject in loaded}
+        if entry['loaded']:
+            registry = subjects.registry(subject)
+            active = registry.get()
+            entry.update({
+                'model_version': active.version,
+                'model_type': active.metadata.get('model_type', 'Linear Regression'),
+                'mean_squared_error': round(active.metadata['mse'], 4),
+                'r2_score': round(active.metadata['r2'], 4),
+                'footprint_bytes': registry.footprint(),
+            })
+        stats[subject] = entry
+    return stats
+
+
+def get_cohort_index(subject=DEFAULT_SUBJECT):
+    """Get the subject's precomputed cohort index, or None if it has not been built."""
+    return cohort_stores[subject].get()
+
+
+def get_encoder(subject=DEFAULT_SUBJECT):
+    """Get the compiled feature encoder for the subject's loaded model."""
+    return subjects.get(subject).encoder
+
+
+def predict(input_data: dict, subject=DEFAULT_SUBJECT) -> float:
     """
     Make a prediction based on input data.
-    
+
     Args:
         input_data: Dictionary with student features
-        
+        subject: Subject whose model to use
+
     Returns:
         Predicted final grade (G3)
     """
-    model, metadata = load_model()
-    feature_names = metadata['feature_names']
-    
-    # Create a DataFrame with all features initialized to 0
-    df = pd.DataFrame(0, index=[0], columns=feature_names)
-    
-    # Fill in the numeric features directly
-    numeric_features = ['age', 'Medu', 'Fedu', 'traveltime', 'studytime', 
-                       'failures', 'famrel', 'freetime', 'goout', 'Dalc', 
-                       'Walc', 'health', 'absences', 'G1', 'G2']
-    
-    for feat in numeric_features:
-        if feat in input_data:
-            df[feat] = input_data[feat]
-    
-    # Handle categorical features (one-hot encoded)
-    categorical_mappings = {
-        'school': ['school_MS'],
-        'sex': ['sex_M'],
-        'address': ['address_U'],
-        'famsize': ['famsize_LE3'],
-        'Pstatus': ['Pstatus_T'],
-        'Mjob': ['Mjob_health', 'Mjob_other', 'Mjob_services', 'Mjob_teacher'],
-        'Fjob': ['Fjob_health', 'Fjob_other', 'Fjob_services', 'Fjob_teacher'],
-        'reason': ['reason_home', 'reason_other', 'reason_reputation'],
-        'guardian': ['guardian_mother', 'guardian_other'],
-        'schoolsup': ['schoolsup_yes'],
-        'famsup': ['famsup_yes'],
-        'paid': ['paid_yes'],
-        'activities': ['activities_yes'],
-        'nursery': ['nursery_yes'],
-        'higher': ['higher_yes'],
-        'internet': ['internet_yes'],
-        'romantic': ['romantic_yes'],
-    }
-    
-    for cat_name, encoded_cols in categorical_mappings.items():
-        if cat_name in input_data:
-            value = input_data[cat_name]
-            for col in encoded_cols:
-                if col in feature_names:
-                    # Check if this encoded column matches the input value
-                    expected_value = col.split('_', 1)[1]
-                    if str(value).lower() == expected_value.lower():
-                        df[col] = 1
-    
-    # Make prediction
-    prediction = model.predict(df)[0]
-    
-    # Clamp prediction to valid grade range (0-20)
-    prediction = max(0, min(20, prediction))
-    
-    return float(prediction)
+    return subjects.get(subject).predict(input_data)
 
+
+def predict_many(rows, subject=DEFAULT_SUBJECT) -> list:
+    """
+    Make predictions for many students in one vectorized pass.
+
+    Args:
+        rows: Sequence of dictionaries with student features
+        subject: Subject whose model to use
+
+    Returns:
+        List of predicted final grades (G3), in input order
+    """
+    return subjects.get(subject).predict_many(rows)
+
+
+def warm_up(subject=DEFAULT_SUBJECT):
+    """
+    Load the model and run throwaway predictions so the first real request
+    does not pay for unpickling, imports or first-call BLAS setup.
+
+    Only the default subject is warmed; the others load on first use.
+    """
+    active = subjects.get(subject)
+    active.predict({})
+    active.predict_many([{}, {}])
+    cohort_stores[subject].get()
+    return active
@@ -0,0 +1,295 @@
+"""
+Versioned model registry with background reload and atomic swap.
+
+The model, its metadata and the compiled encoder are bundled into one
+immutable ModelVersion. Requests read the active version through a single
+attribute lookup, so a reload can never pair a new model with old metadata.
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from .encoder import FeatureEncoder
+from .native import load_native_model
+
+logger = logging.getLogger(__name__)
+
+
+class ModelVersion:
+    """A loaded model together with the metadata and encoder it was trained with."""
+
+    __slots__ = ('model', 'metadata', 'encoder', 'version', 'loaded_at', 'is_linear')
+
+    def __init__(self, model, metadata, version):
+        self.model = model
+        self.is_linear = getattr(model, 'coef_', None) is not None and np.ndim(model.coef_) == 1
+        self.metadata = metadata
+        self.encoder = FeatureEncoder.from_metadata(metadata)
+        self.version = version
+        self.loaded_at = time.time()
+
+    def score(self, X):
+        """
+        Score an encoded feature matrix.
+
+        Linear models use the same ``X @ coef_ + intercept_`` expression as
+        ``LinearRegression.predict`` so results are identical, minus sklearn's
+        input validation overhead; other estimators go through ``predict``.
+        """
+        if self.is_linear:
+            return X @ self.model.coef_ + self.model.intercept_
+        return self.model.predict(X)
+
+    def predict(self, input_data: dict) -> float:
+        """Predict one student's final grade, clamped to 0-20."""
+        return self.predict_encoded(self.encoder.encode(input_data))
+
+    def predict_encoded(self, X) -> float:
+        """Score a single encoded ``(1, n_features)`` row, clamped to 0-20."""
+        prediction = self.score(X)[0]
+        return float(max(0, min(20, prediction)))
+
+    def predict_many(self, rows) -> list:
+        """Predict final grades for many students in one vectorized pass."""
+        if not rows:
+            return []
+        return self.predict_many_encoded(self.encoder.encode_many(rows))
+
+    def predict_many_encoded(self, X) -> list:
+        """Score an encoded ``(n, n_features)`` matrix, clamped to 0-20."""
+        if len(X) == 0:
+            return []
+        return np.clip(self.score(X), 0, 20).tolist()
+
+
+class ModelRegistry:
+    """
+    Owns the active ModelVersion for one set of artifacts on disk.
+
+    The native memory-mapped artifact is preferred when present; the joblib
+    model/metadata pair is the fallback. A background watcher polls the
+    artifacts' mtime and size, loads a changed pair off the request path and
+    swaps it in with a single assignment.
+    """
+
+    def __init__(self, model_path, metadata_path, native_path=None, reload_interval=0):
+        self.model_path = model_path
+        self.metadata_path = metadata_path
+        self.native_path = native_path
+        self.reload_interval = reload_interval
+        self._active = None
+        self._signature = None
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._watcher_pid = None
+        self._stop = threading.Event()
+
+    def _use_native(self):
+        return self.native_path is not None and os.path.exists(self.native_path)
+
+    def _stat_signature(self):
+        if self._use_native():
+            paths = (self.native_path,)
+        else:
+            paths = (self.model_path, self.metadata_path)
+        signature = []
+        for path in paths:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _load_version(self):
+        if self._use_native():
+            signature = self._stat_signature()
+            model, metadata, digest = load_native_model(self.native_path)
+            return ModelVersion(model, metadata, digest[:12]), signature
+
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(
+                "Model not found. Please run train_model.py first."
+            )
+        signature = self._stat_signature()
+        with open(self.model_path, 'rb') as f:
+            model_bytes = f.read()
+        with open(self.metadata_path, 'rb') as f:
+            metadata_bytes = f.read()
+
+        # Imported here so processes that never predict skip joblib/sklearn
+        import joblib
+
+        model = joblib.load(io.BytesIO(model_bytes))
+        metadata = joblib.load(io.BytesIO(metadata_bytes))
+
+        # train_model.py stamps the metadata with the hash of the model it
+        # belongs to; refuse a pair caught halfway through a retrain.
+        model_hash = hashlib.sha256(model_bytes).hexdigest()
+        expected = metadata.get('model_sha256')
+        if expected is not None and expected != model_hash:
+            raise ValueError("Model and metadata artifacts do not belong together")
+        n_features = getattr(model, 'n_features_in_', len(metadata['feature_names']))
+        if n_features != len(metadata['feature_names']):
+            raise ValueError("Model and metadata artifacts do not belong together")
+
+        version = hashlib.sha256(model_bytes + metadata_bytes).hexdigest()[:12]
+        return ModelVersion(model, metadata, version), signature
+
+    def get(self) -> ModelVersion:
+        """Return the active model version, loading it on first use."""
+        active = self._active
+        if active is None:
+            with self._lock:
+                if self._active is None:
+                    self._active, self._signature = self._load_version()
+                    if self.reload_interval > 0:
+                        self.start_watcher(self.reload_interval)
+                active = self._active
+        elif self._watcher_pid is not None and self._watcher_pid != os.getpid():
+            # Threads do not survive a fork: a worker forked after warm-up
+            # (gunicorn --preload) inherits the model but not the watcher
+            with self._lock:
+                if self._watcher_pid != os.getpid():
+                    self.start_watcher(self.reload_interval)
+        return active
+
+    def footprint(self):
+        """Approximate memory held by the active version: its artifacts' size."""
+        if self._signature is None:
+            return 0
+        return sum(size for _, _, size in self._signature)
+
+    def reload(self, force=False) -> bool:
+        """
+        Load the artifacts again if they changed on disk and swap them in.
+
+        Returns:
+            True if a new version became active
+        """
+        with self._lock:
+            if not force and self._active is not None:
+                try:
+                    if self._stat_signature() == self._signature:
+                        return False
+                except OSError:
+                    return False
+            new, signature = self._load_version()
+            self._signature = signature
+            if self._active is not None and new.version == self._active.version:
+                return False
+            self._active = new
+        logger.info("Activated model version %s", new.version)
+        return True
+
+    def start_watcher(self, interval):
+        """Start polling the artifacts every ``interval`` seconds."""
+        if self._watcher is not None and self._watcher.is_alive() and self._watcher_pid == os.getpid():
+            return
+        self._stop.clear()
+        self._watcher_pid = os.getpid()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name='model-watcher', daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watcher(self):
+        """Stop the background watcher."""
+        self._stop.set()
+        if self._watcher is not None:
+            if self._watcher_pid == os.getpid():
+                self._watcher.join()
+            self._watcher = None
+        self._watcher_pid = None
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.reload()
+            except ValueError as e:
+                # Usually a retrain caught between the two writes; retry next poll
+                logger.warning("Model reload skipped: %s", e)
+            except Exception:
+                logger.exception("Model reload failed; keeping version %s",
+                                 self._active.version if self._active else None)
+
+
+class SubjectRegistry:
+    """
+    One lazily loaded ModelRegistry per subject, LRU-evicted under a budget.
+
+    Each subject's model loads on its first request. When the loaded
+    artifacts add up to more than ``memory_budget`` bytes, the least recently
+    used subjects are dropped (and reloaded when next asked for). The subject
+    just requested is never evicted, and a budget of 0 means no limit.
+    """
+
+    def __init__(self, subjects, paths_for, reload_interval=0, memory_budget=0):
+        self.subjects = list(subjects)
+        self.paths_for = paths_for
+        self.reload_interval = reload_interval
+        self.memory_budget = memory_budget
+        self.evictions = 0
+        self._registries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def registry(self, subject) -> ModelRegistry:
+        """
+        The ModelRegistry for ``subject``, created on first use.
+
+        Raises:
+            ValueError: If the subject is unknown
+        """
+        with self._lock:
+            registry = self._registries.get(subject)
+            if registry is None:
+                if subject not in self.subjects:
+                    raise ValueError(f"Unknown subject: {subject}")
+                paths = self.paths_for(subject)
+                registry = ModelRegistry(
+                    paths.model, paths.metadata, paths.native,
+                    reload_interval=self.reload_interval,
+                )
+                self._registries[subject] = registry
+            else:
+                self._registries.move_to_end(subject)
+        return registry
+
+    def get(self, subject) -> ModelVersion:
+        """Return the active model version for ``subject``, loading it if needed."""
+        registry = self.registry(subject)
+        loaded = registry._active is not None
+        active = registry.get()
+        if not loaded and self.memory_budget > 0:
+            self._evict(keep=subject)
+        return active
+
+    def loaded(self):
+        """Subjects with a model in memory, least recently used first."""
+        with self._lock:
+            return [name for name, registry in self._registries.items() if registry._active is not None]
+
+    def footprint(self):
+        """Approximate bytes held by all loaded models."""
+        with self._lock:
+            return sum(registry.footprint() for registry in self._registries.values())
+
+    def _evict(self, keep):
+        evicted = []
+        with self._lock:
+            total = sum(registry.footprint() for registry in self._registries.values())
+            for subject in list(self._registries):
+                if total <= self.memory_budget:
+                    break
+                if subject == keep:
+                    continue
+                registry = self._registries.pop(subject)
+                total -= registry.footprint()
+                evicted.append((subject, registry))
+        for subject, registry in evicted:
+            registry.stop_watcher()
+            self.evictions += 1
+            logger.info("Evicted model for subject %s to stay within the memory budget", subject)
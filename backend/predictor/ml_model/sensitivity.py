@@ -0,0 +1,68 @@
+"""
+What-if sensitivity sweeps over one student's features.
+
+Every perturbed profile differs from the baseline row in a single feature,
+so the sweep matrix is the encoded baseline repeated once per value with that
+feature's column (or one-hot slots) overwritten. The whole matrix is scored
+in one vectorized pass.
+"""
+import numpy as np
+
+
+def build_sweep_matrix(encoder, base_row, sweeps):
+    """
+    Encode every perturbed profile into one matrix.
+
+    Args:
+        encoder: FeatureEncoder that produced ``base_row``
+        base_row: Encoded baseline student, 1-D float64 array
+        sweeps: Sequence of (feature, values) pairs
+
+    Returns:
+        float64 array with one row per swept value, in ``sweeps`` order
+    """
+    total = sum(len(values) for _, values in sweeps)
+    X = np.repeat(base_row[np.newaxis, :], total, axis=0)
+
+    offset = 0
+    for feature, values in sweeps:
+        block = X[offset:offset + len(values)]
+        offset += len(values)
+
+        if feature in encoder.numeric_index:
+            block[:, encoder.numeric_index[feature]] = values
+            continue
+
+        slots = encoder.value_slots.get(feature)
+        if not slots:
+            continue
+        block[:, sorted(set(slots.values()))] = 0
+        # The dropped baseline category has no slot and stays all-zero
+        indexes = [slots.get(str(value).lower()) for value in values]
+        rows = [i for i, index in enumerate(indexes) if index is not None]
+        block[rows, [indexes[i] for i in rows]] = 1
+
+    return X
+
+
+def sensitivity_curves(active, base_row, sweeps):
+    """
+    Predicted grade for every swept value of every feature.
+
+    Args:
+        active: ModelVersion to score with
+        base_row: Baseline student encoded for ``active``
+        sweeps: Sequence of (feature, values) pairs
+
+    Returns:
+        Tuple of (baseline grade, {feature: [grade per value]})
+    """
+    X = build_sweep_matrix(active.encoder, base_row, sweeps)
+    grades = np.clip(active.score(np.vstack([base_row, X])), 0, 20).tolist()
+
+    curves = {}
+    offset = 1
+    for feature, values in sweeps:
+        curves[feature] = grades[offset:offset + len(values)]
+        offset += len(values)
+    return grades[0], curves
@@ -0,0 +1,161 @@
+"""
+Streaming bulk scoring for roster files shaped like student-mat.csv.
+
+Files are read in fixed-size chunks with the same ``pd.read_csv(sep=';')``
+handling train_model.py uses, so memory stays bounded by the chunk size no
+matter how large the upload is. Rows are held to the same integer ranges and
+choices as the single-student endpoints; rows outside them are not scored.
+"""
+import numpy as np
+import pandas as pd
+
+from .predictor import get_active_model
+from .subjects import DEFAULT_SUBJECT
+
+DEFAULT_CHUNK_SIZE = 5000
+OUTPUT_FORMATS = ('csv', 'ndjson')
+PREDICTION_COLUMN = 'predicted_grade'
+
+
+def read_columns(source):
+    """
+    Read the header row of a roster file and rewind it.
+
+    Args:
+        source: Seekable binary file object of a semicolon-separated roster
+
+    Returns:
+        List of column names
+
+    Raises:
+        ValueError: If the file is empty or its header cannot be parsed
+    """
+    try:
+        columns = list(pd.read_csv(source, sep=';', nrows=0).columns)
+    except (pd.errors.EmptyDataError, pd.errors.ParserError, UnicodeDecodeError) as e:
+        raise ValueError(f"Could not read the roster header: {e}") from e
+    finally:
+        source.seek(0)
+    return columns
+
+
+def check_frame(frame, ranges=None, choices=None):
+    """
+    Mark the rows of a chunk whose values are within the schema.
+
+    Args:
+        frame: DataFrame chunk read from the roster file
+        ranges: {column: (min, max)} of integer columns
+        choices: {column: allowed values} of categorical columns
+
+    Returns:
+        Boolean mask of rows with no out-of-range or unknown values. Columns
+        missing from the file are not checked.
+    """
+    valid = np.ones(len(frame), dtype=bool)
+    for name, (low, high) in (ranges or {}).items():
+        if name in frame.columns:
+            values = pd.to_numeric(frame[name], errors='coerce').to_numpy(dtype=np.float64)
+            with np.errstate(invalid='ignore'):
+                valid &= (values >= low) & (values <= high) & (values == np.floor(values))
+    for name, allowed in (choices or {}).items():
+        if name in frame.columns:
+            valid &= frame[name].astype(str).isin(allowed).to_numpy()
+    return valid
+
+
+def encode_frame(encoder, frame, defaults=None, ranges=None, choices=None):
+    """
+    Encode a chunk of roster rows into a feature matrix.
+
+    Args:
+        encoder: FeatureEncoder for the loaded model
+        frame: DataFrame chunk read from the roster file
+        defaults: Values used for feature columns missing from the file
+        ranges: {column: (min, max)} of integer columns, see check_frame
+        choices: {column: allowed values} of categorical columns
+
+    Returns:
+        Tuple of (float64 matrix, boolean mask of rows that could be encoded)
+    """
+    defaults = defaults or {}
+    X = np.zeros((len(frame), encoder.n_features), dtype=np.float64)
+    valid = check_frame(frame, ranges, choices)
+
+    for feat, index in encoder.numeric_index.items():
+        if feat in frame.columns:
+            values = pd.to_numeric(frame[feat], errors='coerce').to_numpy(dtype=np.float64)
+            valid &= ~np.isnan(values)
+            X[:, index] = values
+        elif feat in defaults:
+            X[:, index] = defaults[feat]
+
+    for name, slots in encoder.value_slots.items():
+        if name in frame.columns:
+            values = frame[name].astype(str).str.lower().to_numpy()
+        elif name in defaults:
+            values = np.full(len(frame), str(defaults[name]).lower())
+        else:
+            continue
+        for value, index in slots.items():
+            X[:, index] = values == value
+
+    X[~valid] = 0
+    return X, valid
+
+
+def score_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE, defaults=None, subject=DEFAULT_SUBJECT,
+                 ranges=None, choices=None):
+    """
+    Read a roster file in chunks and score each chunk.
+
+    Args:
+        source: Path or binary file object of a semicolon-separated roster
+        chunk_size: Number of rows read and scored at a time
+        defaults: Values used for feature columns missing from the file
+        subject: Subject whose model scores the roster
+        ranges: {column: (min, max)} of integer columns, see check_frame
+        choices: {column: allowed values} of categorical columns
+
+    Yields:
+        DataFrame chunks with a ``predicted_grade`` column appended. Rows
+        with unparseable, out-of-range or unknown values get an empty
+        prediction.
+    """
+    # Score the whole file with one model version even if a reload happens
+    active = get_active_model(subject)
+
+    for frame in pd.read_csv(source, sep=';', chunksize=chunk_size):
+        X, valid = encode_frame(active.encoder, frame, defaults, ranges, choices)
+        predictions = np.clip(active.score(X), 0, 20).round(2)
+        frame[PREDICTION_COLUMN] = np.where(valid, predictions, np.nan)
+        yield frame
+
+
+def stream_scores(source, output_format='csv', chunk_size=DEFAULT_CHUNK_SIZE, defaults=None,
+                  subject=DEFAULT_SUBJECT, ranges=None, choices=None):
+    """
+    Score a roster file and render the results incrementally.
+
+    Args:
+        source: Path or binary file object of a semicolon-separated roster
+        output_format: 'csv' (same dialect as the input) or 'ndjson'
+        chunk_size: Number of rows read and scored at a time
+        defaults: Values used for feature columns missing from the file
+        subject: Subject whose model scores the roster
+        ranges: {column: (min, max)} of integer columns, see check_frame
+        choices: {column: allowed values} of categorical columns
+
+    Yields:
+        Encoded text blocks, one per chunk
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format}")
+
+    header = True
+    for frame in score_chunks(source, chunk_size, defaults, subject, ranges, choices):
+        if output_format == 'csv':
+            yield frame.to_csv(sep=';', index=False, header=header)
+            header = False
+        elif len(frame):
+            yield frame.to_json(orient='records', lines=True).rstrip('\n') + '\n'
@@ -0,0 +1,45 @@
+"""
+Subjects the predictor serves, and where each one's artifacts live.
+
+Every subject is one dataset CSV with its own model. The default subject
+keeps its artifacts directly in this directory, where they have always been;
+other subjects get a ``subject_models/<name>/`` directory with the same file
+names.
+Adding a subject means adding its dataset here and training it with
+``train_model.py --subject <name>``.
+"""
+import os
+from collections import namedtuple
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Subject name -> dataset file in the data directory
+SUBJECTS = {
+    'mat': 'student-mat.csv',
+    'por': 'student-por.csv',
+}
+DEFAULT_SUBJECT = 'mat'
+
+ArtifactPaths = namedtuple('ArtifactPaths', [
+    'model', 'metadata', 'native', 'cohort_index', 'online_stats', 'history',
+])
+
+
+def subject_paths(subject=DEFAULT_SUBJECT):
+    """
+    Artifact file paths for one subject.
+
+    Raises:
+        ValueError: If the subject is not in SUBJECTS
+    """
+    if subject not in SUBJECTS:
+        raise ValueError(f"Unknown subject: {subject}")
+    base = SCRIPT_DIR if subject == DEFAULT_SUBJECT else os.path.join(SCRIPT_DIR, 'subject_models', subject)
+    return ArtifactPaths(
+        model=os.path.join(base, 'trained_model.joblib'),
+        metadata=os.path.join(base, 'model_metadata.joblib'),
+        native=os.path.join(base, 'trained_model.bin'),
+        cohort_index=os.path.join(base, 'cohort_index.npz'),
+        online_stats=os.path.join(base, 'online_stats.npz'),
+        history=os.path.join(base, 'history'),
+    )
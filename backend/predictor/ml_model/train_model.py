@@ -1,8 +1,24 @@
 """
 Script to train and save the Linear Regression model for student performance prediction.
-Run this script once to generate the trained model file.
+Run this script once to generate the trained model file, either directly or
+as a module from the backend directory:
+
+    python predictor/ml_model/train_model.py [--subject por] [--pipeline]
+    python -m predictor.ml_model.train_model [--subject por] [--pipeline]
+
+``--pipeline`` instead cross-validates a set of candidate models on every
+dataset in parallel and saves the best one along with the leaderboard.
+Either way the cohort index is rebuilt for the saved model;
+``--cohort-index`` rebuilds only that.
+
+``--subject <name>`` trains that subject's model (see subjects.py) instead
+of the default one.
 """
 import os
+import sys
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 from sklearn import linear_model
@@ -10,40 +26,226 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, r2_score
 import joblib
 
+if not __package__:
+    # Run as a script: make the backend directory importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from predictor.ml_model.cohort import build_cohort_index
+from predictor.ml_model.dataset_cache import DatasetCache
+from predictor.ml_model.native import write_native_model
+from predictor.ml_model.online import SufficientStats, VersionHistory, load_stats, save_stats
+from predictor.ml_model.registry import ModelRegistry
+from predictor.ml_model.subjects import DEFAULT_SUBJECT, SUBJECTS, subject_paths
+
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(SCRIPT_DIR))), 'data')
-MODEL_PATH = os.path.join(SCRIPT_DIR, 'trained_model.joblib')
-METADATA_PATH = os.path.join(SCRIPT_DIR, 'model_metadata.joblib')
+# Artifacts of the default subject; other subjects' come from subject_paths()
+MODEL_PATH, METADATA_PATH, NATIVE_MODEL_PATH, COHORT_INDEX_PATH, ONLINE_STATS_PATH, HISTORY_DIR = (
+    subject_paths(DEFAULT_SUBJECT)
+)
+DATASET_CACHE_DIR = os.path.join(SCRIPT_DIR, '.dataset_cache')
 
+CATEGORICAL_COLUMNS = ['school', 'sex', 'address', 'famsize', 'Pstatus',
+                       'Mjob', 'Fjob', 'reason', 'guardian', 'schoolsup',
+                       'famsup', 'paid', 'activities', 'nursery', 'higher',
+                       'internet', 'romantic']
 
-def train_and_save_model():
-    """Train the model and save it along with metadata."""
-    # Load the dataset
-    file_path = os.path.join(DATA_DIR, "student-mat.csv")
+DATASETS = list(SUBJECTS.values())
+# The dataset the server predicts for by default; each subject trains on its own
+PRIMARY_DATASET = SUBJECTS[DEFAULT_SUBJECT]
+
+MODEL_TYPES = {
+    'linear': 'Linear Regression',
+    'ridge': 'Ridge Regression',
+    'lasso': 'Lasso Regression',
+    'gradient_boosting': 'Gradient Boosting',
+    'random_forest': 'Random Forest',
+}
+
+
+def _atomic_dump(obj, path):
+    """Write a joblib artifact via a temp file and rename; return its sha256."""
+    tmp_path = path + '.tmp'
+    joblib.dump(obj, tmp_path)
+    with open(tmp_path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    os.replace(tmp_path, path)
+    return digest
+
+
+def export_native_model(model, metadata, path=None):
+    """Export a linear model as the memory-mappable native artifact."""
+    header = {
+        'feature_names': list(metadata['feature_names']),
+        'categorical_columns': list(metadata['categorical_columns']),
+        'mse': float(metadata['mse']),
+        'r2': float(metadata['r2']),
+        'train_size': int(metadata['train_size']),
+        'test_size': int(metadata['test_size']),
+        'model_sha256': metadata.get('model_sha256'),
+    }
+    for key in ('model_type', 'leaderboard', 'online_updates'):
+        if key in metadata:
+            header[key] = metadata[key]
+    write_native_model(path or NATIVE_MODEL_PATH, model.coef_, model.intercept_, header)
+
+
+def _load_saved_model(subject=DEFAULT_SUBJECT):
+    paths = subject_paths(subject)
+    return ModelRegistry(paths.model, paths.metadata, paths.native).get()
+
+
+def save_model(model, metadata, subject=DEFAULT_SUBJECT):
+    """
+    Save the model and its metadata, plus the native artifact for linear models.
     
-    if not os.path.exists(file_path):
-        print(f"Error: Dataset not found at {file_path}")
-        print("Please download the student-mat.csv file and place it in the 'data' folder.")
-        return False
+    The metadata is stamped with the model's hash so a running server never
+    pairs a new model with stale metadata.
+    """
+    paths = subject_paths(subject)
+    os.makedirs(os.path.dirname(paths.model), exist_ok=True)
+    metadata = dict(metadata, model_sha256=_atomic_dump(model, paths.model))
+    _atomic_dump(metadata, paths.metadata)
     
-    data = pd.read_csv(file_path, sep=';')
+    if getattr(model, 'coef_', None) is not None and np.ndim(model.coef_) == 1:
+        # Save the sklearn-free artifact the server memory-maps
+        export_native_model(model, metadata, paths.native)
+    elif os.path.exists(paths.native):
+        # The server prefers the native file; drop it so the new joblib wins
+        os.remove(paths.native)
     
-    # Store original column info before one-hot encoding
-    categorical_columns = ['school', 'sex', 'address', 'famsize', 'Pstatus',
-                          'Mjob', 'Fjob', 'reason', 'guardian', 'schoolsup',
-                          'famsup', 'paid', 'activities', 'nursery', 'higher',
-                          'internet', 'romantic']
+    # Online updates refit plain least squares, so stale statistics must not
+    # outlive a switch to another model type
+    if metadata.get('model_type', MODEL_TYPES['linear']) != MODEL_TYPES['linear']:
+        if os.path.exists(paths.online_stats):
+            os.remove(paths.online_stats)
     
-    # Convert categorical variables to one-hot encoding
-    data_encoded = pd.get_dummies(data, columns=categorical_columns, drop_first=True)
+    return metadata
+
+
+def save_cohort_index(subject=DEFAULT_SUBJECT):
+    """
+    Score every student in DATASETS with the subject's saved model and write
+    the cohort index the API uses for percentiles and /cohort-stats/.
+    """
+    path = subject_paths(subject).cohort_index
+    count = build_cohort_index(_load_saved_model(subject), DATA_DIR, DATASETS, path)
+    print(f"Cohort index ({count} students) saved to: {path}")
+
+
+def save_online_stats(X_train, y_train, X_test, y_test, feature_names, subject=DEFAULT_SUBJECT):
+    """Save the sufficient statistics online updates start from."""
+    save_stats(
+        subject_paths(subject).online_stats, feature_names,
+        SufficientStats.from_rows(X_train, y_train),
+        SufficientStats.from_rows(X_test, y_test),
+    )
+
+
+def rebuild_online_stats(subject=DEFAULT_SUBJECT):
+    """Recompute the statistics for the subject's training split."""
+    X, y, feature_names = load_encoded_dataset(SUBJECTS[subject])
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    save_online_stats(X_train, y_train, X_test, y_test, feature_names, subject)
+    print(f"Online statistics saved to: {subject_paths(subject).online_stats}")
+
+
+def _version_history(subject=DEFAULT_SUBJECT):
+    paths = subject_paths(subject)
+    return VersionHistory(paths.history, [
+        paths.model, paths.metadata, paths.native, paths.online_stats, paths.cohort_index,
+    ])
+
+
+def apply_online_update(rows, grades, subject=DEFAULT_SUBJECT):
+    """
+    Fold confirmed outcomes into the linear model and publish a new version.
     
-    # Select features and target variable
-    features = data_encoded.drop(columns=['G3'])
-    target = data_encoded['G3']
+    The previous artifacts are snapshotted first so rollback_model() can
+    restore them. MSE and R² are recomputed on the original test split from
+    its stored statistics.
+    
+    Args:
+        rows: Student feature dicts, as stored in Prediction.input_data
+        grades: Confirmed final grades (G3), one per row
+        subject: Subject whose model the outcomes belong to
+    
+    Returns:
+        Tuple of (previous version, new version)
+    """
+    stats_path = subject_paths(subject).online_stats
+    active = _load_saved_model(subject)
+    model_type = active.metadata.get('model_type', MODEL_TYPES['linear'])
+    if model_type != MODEL_TYPES['linear'] or not os.path.exists(stats_path):
+        raise ValueError("Online updates need a Linear Regression model with saved statistics")
+    feature_names, train, test = load_stats(stats_path)
+    if feature_names != list(active.metadata['feature_names']):
+        raise ValueError("Online statistics do not match the active model's features")
+    
+    train.add(active.encoder.encode_many(rows), grades)
+    coef, intercept = train.solve()
+    mse, r2 = test.metrics(coef, intercept)
+    
+    model = linear_model.LinearRegression()
+    model.coef_ = coef
+    model.intercept_ = intercept
+    model.n_features_in_ = len(coef)
+    
+    metadata = {
+        key: value for key, value in active.metadata.items() if key != 'model_sha256'
+    }
+    metadata.update(
+        mse=mse,
+        r2=r2,
+        train_size=train.n,
+        online_updates=metadata.get('online_updates', 0) + 1,
+    )
+    
+    _version_history(subject).push(active.version)
+    save_model(model, metadata, subject)
+    save_stats(stats_path, feature_names, train, test)
+    save_cohort_index(subject)
+    
+    return active.version, _load_saved_model(subject).version
+
+
+def rollback_model(subject=DEFAULT_SUBJECT):
+    """
+    Restore the subject's artifacts from before its last online update.
+    
+    Returns:
+        Tuple of (rolled-back version, restored version)
+    
+    Raises:
+        LookupError: If there is no earlier version to restore
+    """
+    current = _load_saved_model(subject).version
+    restored = _version_history(subject).pop()
+    return current, restored
+
+
+def export_native_from_joblib(subject=DEFAULT_SUBJECT):
+    """Convert the existing joblib artifacts into the native format."""
+    paths = subject_paths(subject)
+    export_native_model(joblib.load(paths.model), joblib.load(paths.metadata), paths.native)
+    print(f"Native model saved to: {paths.native}")
+
+
+def train_and_save_model(subject=DEFAULT_SUBJECT):
+    """Train the subject's model and save it along with metadata."""
+    # Load the dataset
+    dataset = SUBJECTS[subject]
+    file_path = os.path.join(DATA_DIR, dataset)
+    
+    if not os.path.exists(file_path):
+        print(f"Error: Dataset not found at {file_path}")
+        print(f"Please download the {dataset} file and place it in the 'data' folder.")
+        return False
     
-    # Get feature names after encoding
-    feature_names = features.columns.tolist()
+    # One-hot encoded features and target, from the dataset cache when fresh
+    categorical_columns = CATEGORICAL_COLUMNS
+    features, target, feature_names = load_encoded_dataset(dataset)
     
     # Split the data
     X_train, X_test, y_train, y_test = train_test_split(
@@ -59,10 +261,7 @@ def train_and_save_model():
     mse = mean_squared_error(y_test, y_pred)
     r2 = r2_score(y_test, y_pred)
     
-    # Save the model
-    joblib.dump(model, MODEL_PATH)
-    
-    # Save metadata
+    # Save the model and metadata
     metadata = {
         'feature_names': feature_names,
         'mse': mse,
@@ -71,16 +270,205 @@ def train_and_save_model():
         'train_size': len(X_train),
         'test_size': len(X_test),
     }
-    joblib.dump(metadata, METADATA_PATH)
+    if subject != DEFAULT_SUBJECT:
+        metadata['dataset'] = dataset
+    save_model(model, metadata, subject)
+    save_online_stats(X_train, y_train, X_test, y_test, feature_names, subject)
+    save_cohort_index(subject)
     
     print(f"Model trained and saved successfully!")
     print(f"Mean Squared Error: {mse:.4f}")
     print(f"R² Score: {r2:.4f}")
-    print(f"Model saved to: {MODEL_PATH}")
+    print(f"Model saved to: {subject_paths(subject).model}")
     
     return True
 
 
+def _encode_dataset(file_path):
+    """Parse a dataset CSV and one-hot encode its categorical columns."""
+    data = pd.read_csv(file_path, sep=';')
+    data_encoded = pd.get_dummies(data, columns=CATEGORICAL_COLUMNS, drop_first=True)
+    features = data_encoded.drop(columns=['G3'])
+    X = features.to_numpy(dtype=np.float64)
+    y = data_encoded['G3'].to_numpy(dtype=np.float64)
+    return X, y, features.columns.tolist()
+
+
+def load_encoded_dataset(filename, use_cache=True):
+    """
+    Load a dataset one-hot encoded for training.
+    
+    The encoded arrays are cached on disk, keyed by the CSV contents and the
+    encoding spec, and memory-mapped on later runs.
+    
+    Returns:
+        Tuple of (float64 feature matrix, float64 target, feature names)
+    """
+    file_path = os.path.join(DATA_DIR, filename)
+    if not use_cache:
+        return _encode_dataset(file_path)
+    
+    spec = {
+        'sep': ';',
+        'categorical_columns': CATEGORICAL_COLUMNS,
+        'drop_first': True,
+        'target': 'G3',
+    }
+    return DatasetCache(DATASET_CACHE_DIR).load(
+        file_path, spec, lambda: _encode_dataset(file_path)
+    )
+
+
+def get_candidate_models():
+    """Factories for every model the pipeline cross-validates, keyed by name."""
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+    
+    return {
+        'linear': lambda: linear_model.LinearRegression(),
+        'ridge': lambda: linear_model.Ridge(alpha=1.0),
+        'lasso': lambda: linear_model.Lasso(alpha=0.1, max_iter=10000),
+        'gradient_boosting': lambda: GradientBoostingRegressor(random_state=42),
+        'random_forest': lambda: RandomForestRegressor(n_estimators=200, random_state=42, n_jobs=1),
+    }
+
+
+# Encoded datasets shipped once to each pool worker by _init_worker
+_worker_datasets = {}
+
+
+def _init_worker(datasets):
+    _worker_datasets.update(datasets)
+
+
+def evaluate_candidate(dataset, name, folds):
+    """
+    Cross-validate one candidate on one dataset.
+    
+    Returns:
+        Leaderboard entry with error metrics, fit time and predict latency
+    """
+    from sklearn.model_selection import KFold
+    from sklearn.metrics import mean_absolute_error
+    
+    X, y = _worker_datasets[dataset]
+    factory = get_candidate_models()[name]
+    mse, mae, r2, fit_times, latencies = [], [], [], [], []
+    
+    for train_idx, test_idx in KFold(n_splits=folds, shuffle=True, random_state=42).split(X):
+        model = factory()
+        start = time.perf_counter()
+        model.fit(X[train_idx], y[train_idx])
+        fit_times.append(time.perf_counter() - start)
+        
+        start = time.perf_counter()
+        y_pred = model.predict(X[test_idx])
+        latencies.append((time.perf_counter() - start) / len(test_idx))
+        
+        mse.append(mean_squared_error(y[test_idx], y_pred))
+        mae.append(mean_absolute_error(y[test_idx], y_pred))
+        r2.append(r2_score(y[test_idx], y_pred))
+    
+    return {
+        'dataset': dataset,
+        'model': name,
+        'folds': folds,
+        'mse': float(np.mean(mse)),
+        'mse_std': float(np.std(mse)),
+        'mae': float(np.mean(mae)),
+        'r2': float(np.mean(r2)),
+        'r2_std': float(np.std(r2)),
+        'fit_time_s': float(np.mean(fit_times)),
+        'predict_latency_us': float(np.mean(latencies) * 1e6),
+    }
+
+
+def run_training_pipeline(folds=5, max_workers=None, save=True, subject=DEFAULT_SUBJECT):
+    """
+    Cross-validate every candidate on every dataset in parallel and save the
+    best model for the subject's dataset.
+    
+    Each dataset is parsed and encoded once, then shared with the process
+    pool workers instead of being re-encoded per candidate.
+    
+    Returns:
+        The leaderboard, best first within each dataset
+    """
+    datasets = {}
+    feature_names = {}
+    for filename in DATASETS:
+        if os.path.exists(os.path.join(DATA_DIR, filename)):
+            X, y, names = load_encoded_dataset(filename)
+            datasets[filename] = (X, y)
+            feature_names[filename] = names
+    
+    primary = SUBJECTS[subject]
+    if primary not in datasets:
+        print(f"Error: Dataset not found at {os.path.join(DATA_DIR, primary)}")
+        return []
+    
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(datasets,)) as pool:
+        futures = [
+            pool.submit(evaluate_candidate, dataset, name, folds)
+            for dataset in datasets
+            for name in get_candidate_models()
+        ]
+        leaderboard = [future.result() for future in futures]
+    
+    leaderboard.sort(key=lambda entry: (entry['dataset'], entry['mse']))
+    
+    print(f"{'dataset':<18}{'model':<20}{'MSE':>8}{'R²':>8}{'MAE':>8}{'fit s':>10}{'pred µs':>10}")
+    for entry in leaderboard:
+        print(f"{entry['dataset']:<18}{entry['model']:<20}{entry['mse']:>8.3f}{entry['r2']:>8.3f}"
+              f"{entry['mae']:>8.3f}{entry['fit_time_s']:>10.4f}{entry['predict_latency_us']:>10.2f}")
+    
+    if save:
+        best = next(entry for entry in leaderboard if entry['dataset'] == primary)
+        X, y = datasets[primary]
+        
+        # Refit the winner on the same 80/20 split train_and_save_model uses
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42
+        )
+        model = get_candidate_models()[best['model']]()
+        model.fit(X_train, y_train)
+        y_pred = model.predict(X_test)
+        
+        save_model(model, {
+            'feature_names': feature_names[primary],
+            'mse': mean_squared_error(y_test, y_pred),
+            'r2': r2_score(y_test, y_pred),
+            'categorical_columns': CATEGORICAL_COLUMNS,
+            'train_size': len(X_train),
+            'test_size': len(X_test),
+            'model_type': MODEL_TYPES[best['model']],
+            'dataset': primary,
+            'leaderboard': leaderboard,
+        }, subject)
+        print(f"Saved {MODEL_TYPES[best['model']]} (CV MSE {best['mse']:.4f}) to: "
+              f"{subject_paths(subject).model}")
+        if best['model'] == 'linear':
+            save_online_stats(X_train, y_train, X_test, y_test, feature_names[primary], subject)
+        save_cohort_index(subject)
+    
+    return leaderboard
+
+
 if __name__ == "__main__":
-    train_and_save_model()
+    subject = DEFAULT_SUBJECT
+    if '--subject' in sys.argv:
+        subject = sys.argv[sys.argv.index('--subject') + 1]
+        if subject not in SUBJECTS:
+            sys.exit(f"Unknown subject: {subject}. Available: {', '.join(SUBJECTS)}")
+    
+    if '--export-native' in sys.argv:
+        export_native_from_joblib(subject)
+    elif '--cohort-index' in sys.argv:
+        save_cohort_index(subject)
+    elif '--online-stats' in sys.argv:
+        rebuild_online_stats(subject)
+    elif '--pipeline' in sys.argv:
+        run_training_pipeline(save='--dry-run' not in sys.argv, subject=subject)
+    else:
+        train_and_save_model(subject)
 
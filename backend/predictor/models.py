@@ -1,15 +1,76 @@
+import uuid
+
 from django.db import models
+from django.utils import timezone
+
+from .ml_model.subjects import DEFAULT_SUBJECT
+
+
+GRADE_BANDS = ['poor', 'average', 'good', 'excellent']
+
+
+def grade_band(grade):
+    """Bucket a 0-20 grade the same way the frontend colours results."""
+    if grade >= 16:
+        return 'excellent'
+    if grade >= 12:
+        return 'good'
+    if grade >= 10:
+        return 'average'
+    return 'poor'
 
 
 class Prediction(models.Model):
     """Store prediction history"""
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Assigned when the prediction is made, so it can be returned to the
+    # client before the write-behind queue persists the row
+    uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     input_data = models.JSONField()
     predicted_grade = models.FloatField()
     
+    # Denormalized from input_data/predicted_grade for indexed filtering
+    school = models.CharField(max_length=2, blank=True, default='')
+    grade_band = models.CharField(max_length=10, blank=True, default='')
+    
+    # Subject whose model made the prediction
+    subject = models.CharField(max_length=10, default=DEFAULT_SUBJECT)
+    
+    # Confirmed final grade, once known, and the model version it was
+    # folded into by ``manage.py update_model`` (blank until then)
+    actual_grade = models.FloatField(null=True, blank=True)
+    confirmed_at = models.DateTimeField(null=True, blank=True)
+    applied_version = models.CharField(max_length=12, blank=True, default='')
+    
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='prediction_created_idx'),
+            models.Index(fields=['school', 'created_at', 'id'], name='prediction_school_idx'),
+            models.Index(fields=['grade_band', 'created_at', 'id'], name='prediction_band_idx'),
+            models.Index(fields=['subject', 'created_at', 'id'], name='prediction_subject_idx'),
+        ]
+    
+    @classmethod
+    def build(cls, input_data, predicted_grade, **kwargs):
+        """
+        Create an unsaved Prediction with its denormalized columns filled,
+        ready for save() or bulk_create (which bypasses save()).
+        """
+        return cls(
+            input_data=input_data,
+            predicted_grade=predicted_grade,
+            school=input_data.get('school', ''),
+            grade_band=grade_band(predicted_grade),
+            **kwargs
+        )
+    
+    def save(self, *args, **kwargs):
+        if not self.school:
+            self.school = self.input_data.get('school', '')
+        if not self.grade_band:
+            self.grade_band = grade_band(self.predicted_grade)
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"Prediction: {self.predicted_grade:.2f} at {self.created_at}"
-
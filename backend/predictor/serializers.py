@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Prediction
+from .choices import choice_values
 
 
 class StudentDataSerializer(serializers.Serializer):
@@ -22,31 +23,56 @@ class StudentDataSerializer(serializers.Serializer):
     G2 = serializers.IntegerField(min_value=0, max_value=20, default=10, help_text="Second period grade")
     
     # Categorical features
-    school = serializers.ChoiceField(choices=['GP', 'MS'], default='GP')
-    sex = serializers.ChoiceField(choices=['F', 'M'], default='F')
-    address = serializers.ChoiceField(choices=['U', 'R'], default='U')
-    famsize = serializers.ChoiceField(choices=['GT3', 'LE3'], default='GT3')
-    Pstatus = serializers.ChoiceField(choices=['T', 'A'], default='T')
-    Mjob = serializers.ChoiceField(choices=['teacher', 'health', 'services', 'at_home', 'other'], default='other')
-    Fjob = serializers.ChoiceField(choices=['teacher', 'health', 'services', 'at_home', 'other'], default='other')
-    reason = serializers.ChoiceField(choices=['home', 'reputation', 'course', 'other'], default='course')
-    guardian = serializers.ChoiceField(choices=['mother', 'father', 'other'], default='mother')
-    schoolsup = serializers.ChoiceField(choices=['yes', 'no'], default='no')
-    famsup = serializers.ChoiceField(choices=['yes', 'no'], default='yes')
-    paid = serializers.ChoiceField(choices=['yes', 'no'], default='no')
-    activities = serializers.ChoiceField(choices=['yes', 'no'], default='no')
-    nursery = serializers.ChoiceField(choices=['yes', 'no'], default='yes')
-    higher = serializers.ChoiceField(choices=['yes', 'no'], default='yes')
-    internet = serializers.ChoiceField(choices=['yes', 'no'], default='yes')
-    romantic = serializers.ChoiceField(choices=['yes', 'no'], default='no')
+    school = serializers.ChoiceField(choices=choice_values('school'), default='GP')
+    sex = serializers.ChoiceField(choices=choice_values('sex'), default='F')
+    address = serializers.ChoiceField(choices=choice_values('address'), default='U')
+    famsize = serializers.ChoiceField(choices=choice_values('famsize'), default='GT3')
+    Pstatus = serializers.ChoiceField(choices=choice_values('Pstatus'), default='T')
+    Mjob = serializers.ChoiceField(choices=choice_values('Mjob'), default='other')
+    Fjob = serializers.ChoiceField(choices=choice_values('Fjob'), default='other')
+    reason = serializers.ChoiceField(choices=choice_values('reason'), default='course')
+    guardian = serializers.ChoiceField(choices=choice_values('guardian'), default='mother')
+    schoolsup = serializers.ChoiceField(choices=choice_values('schoolsup'), default='no')
+    famsup = serializers.ChoiceField(choices=choice_values('famsup'), default='yes')
+    paid = serializers.ChoiceField(choices=choice_values('paid'), default='no')
+    activities = serializers.ChoiceField(choices=choice_values('activities'), default='no')
+    nursery = serializers.ChoiceField(choices=choice_values('nursery'), default='yes')
+    higher = serializers.ChoiceField(choices=choice_values('higher'), default='yes')
+    internet = serializers.ChoiceField(choices=choice_values('internet'), default='yes')
+    romantic = serializers.ChoiceField(choices=choice_values('romantic'), default='no')
+
+
+def get_student_defaults():
+    """Default value of every student feature, as declared on the serializer."""
+    return {
+        name: field.default
+        for name, field in StudentDataSerializer().fields.items()
+    }
 
 
 class PredictionSerializer(serializers.ModelSerializer):
-    """Serializer for prediction results."""
+    """Serializer for prediction results.
+    
+    Accepts an optional ``fields`` argument to serialize only a subset.
+    """
     class Meta:
         model = Prediction
-        fields = ['id', 'created_at', 'input_data', 'predicted_grade']
-        read_only_fields = ['id', 'created_at']
+        fields = ['id', 'uuid', 'created_at', 'input_data', 'predicted_grade', 'school', 'grade_band',
+                  'subject', 'actual_grade', 'confirmed_at']
+        read_only_fields = ['id', 'uuid', 'created_at', 'school', 'grade_band', 'subject',
+                            'actual_grade', 'confirmed_at']
+    
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class OutcomeSerializer(serializers.Serializer):
+    """Serializer for a confirmed final grade."""
+    actual_grade = serializers.IntegerField(min_value=0, max_value=20)
 
 
 class PredictionResultSerializer(serializers.Serializer):
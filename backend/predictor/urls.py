@@ -1,11 +1,25 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if getattr(settings, 'PREDICTOR_ASYNC_VIEWS', False):
+    from . import async_views as hot_views
+else:
+    hot_views = views
+
 urlpatterns = [
-    path('predict/', views.predict_grade, name='predict_grade'),
-    path('model-info/', views.model_info, name='model_info'),
+    path('predict/', hot_views.predict_grade, name='predict_grade'),
+    path('predict/batch/', views.predict_batch, name='predict_batch'),
+    path('predict/sensitivity/', views.predict_sensitivity, name='predict_sensitivity'),
+    path('predict/upload/', views.predict_upload, name='predict_upload'),
+    path('model-info/', hot_views.model_info, name='model_info'),
+    path('model-info/cache/', views.model_cache_stats, name='model_cache_stats'),
+    path('cohort-stats/', views.cohort_stats, name='cohort_stats'),
     path('feature-options/', views.feature_options, name='feature_options'),
-    path('predictions/', views.prediction_history, name='prediction_history'),
+    path('predictions/', hot_views.prediction_history, name='prediction_history'),
+    path('predictions/<uuid:prediction_id>/outcome/', views.record_outcome, name='record_outcome'),
+    path('datasets/', views.dataset_manifest, name='dataset_manifest'),
     path('datasets/<str:filename>/', views.download_dataset, name='download_dataset'),
+    path('datasets/<str:filename>/query/', views.dataset_query, name='dataset_query'),
 ]
 
@@ -0,0 +1,130 @@
+"""
+Compiled fast-path validation for the student schema.
+
+StudentDataSerializer runs every field through DRF's generic machinery. The
+validator here is generated from the same field definitions: a table of
+integer ranges and choice sets that accepts the common case (plain ints and
+strings, defaults for missing keys) in one loop and writes the encoded
+feature row at the same time.
+
+Anything the table does not accept outright (strings for integers, floats,
+nulls, out-of-range values, non-dict bodies) is handed to the serializer,
+so the coerced values and error payloads are exactly DRF's.
+"""
+import weakref
+from collections import OrderedDict
+
+from rest_framework import serializers
+
+from .serializers import StudentDataSerializer
+
+_MISSING = object()
+
+# Kinds of entries in the compiled table
+_INTEGER = 0
+_CHOICE = 1
+
+
+class StudentValidator:
+    """Table-driven validator compiled from a serializer's fields."""
+
+    def __init__(self, serializer_class=StudentDataSerializer):
+        self.serializer_class = serializer_class
+        self.table = []
+        for name, field in serializer_class().fields.items():
+            if isinstance(field, serializers.ChoiceField):
+                self.table.append((name, _CHOICE, frozenset(field.choices), None, field.default))
+            elif isinstance(field, serializers.IntegerField):
+                self.table.append((name, _INTEGER, field.min_value, field.max_value, field.default))
+            else:
+                raise TypeError(f"No fast path for {type(field).__name__} field '{name}'")
+        self._plans = weakref.WeakKeyDictionary()
+
+    def rules(self):
+        """
+        The compiled bounds, for callers that check many rows at once.
+
+        Returns:
+            Tuple of ({field: (min, max)} for integers, {field: frozenset} for choices)
+        """
+        ranges = {name: (a, b) for name, kind, a, b, _ in self.table if kind == _INTEGER}
+        choices = {name: a for name, kind, a, _, _ in self.table if kind == _CHOICE}
+        return ranges, choices
+
+    def _plan(self, encoder):
+        """Attach each field's output column (or per-choice slot) for an encoder."""
+        plan = self._plans.get(encoder)
+        if plan is None:
+            plan = []
+            for name, kind, a, b, default in self.table:
+                if kind == _INTEGER:
+                    target = encoder.numeric_index.get(name)
+                else:
+                    slots = encoder.value_slots.get(name, {})
+                    target = {choice: slots.get(str(choice).lower()) for choice in a}
+                plan.append((name, kind, a, b, default, target))
+            plan = tuple(plan)
+            self._plans[encoder] = plan
+        return plan
+
+    def validate(self, data, encoder=None, row=None):
+        """
+        Validate one student and optionally encode it.
+
+        Args:
+            data: Parsed request body
+            encoder: FeatureEncoder whose layout ``row`` follows
+            row: Zeroed 1-D float64 array to receive the encoded features
+
+        Returns:
+            Tuple of (validated data, errors); exactly one of them is None
+        """
+        if type(data) is dict and encoder is not None:
+            validated = self._fast_path(data, self._plan(encoder), row)
+            if validated is not None:
+                return validated, None
+        elif type(data) is dict:
+            validated = self._fast_path(data, self.table, None)
+            if validated is not None:
+                return validated, None
+
+        serializer = self.serializer_class(data=data)
+        if not serializer.is_valid():
+            return None, serializer.errors
+        validated = serializer.validated_data
+        if row is not None:
+            row.fill(0)
+            encoder.encode_into(validated, row)
+        return validated, None
+
+    @staticmethod
+    def _fast_path(data, plan, row):
+        validated = OrderedDict()
+        writes = []
+        for entry in plan:
+            name, kind, a, b, default = entry[:5]
+            value = data.get(name, _MISSING)
+            if value is _MISSING:
+                value = default
+            if kind == _INTEGER:
+                if type(value) is not int or value < a or value > b:
+                    return None
+            elif type(value) is not str or value not in a:
+                return None
+            validated[name] = value
+            if row is not None:
+                writes.append((entry[5], kind, value))
+
+        if row is not None:
+            for target, kind, value in writes:
+                if kind == _INTEGER:
+                    if target is not None:
+                        row[target] = value
+                else:
+                    index = target[value]
+                    if index is not None:
+                        row[index] = 1
+        return validated
+
+
+student_validator = StudentValidator()
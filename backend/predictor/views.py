@@ -1,48 +1,315 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-from django.http import FileResponse, Http404
+from rest_framework.exceptions import ValidationError
+from django.conf import settings
+from django.http import (
+    Http404, HttpResponse, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse,
+)
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from datetime import datetime
+import base64
+import hashlib
 import os
 
-from .models import Prediction
-from .serializers import StudentDataSerializer, PredictionSerializer, PredictionResultSerializer
-from .ml_model.predictor import predict, get_model_info
+import numpy as np
+
+from .models import Prediction, GRADE_BANDS
+from .serializers import (
+    StudentDataSerializer, PredictionSerializer, PredictionResultSerializer, OutcomeSerializer,
+    get_student_defaults,
+)
+from .ml_model.predictor import (
+    predict_many, get_model_info, load_model, get_active_model, get_cohort_index, subjects,
+)
+from .ml_model.subjects import DEFAULT_SUBJECT, SUBJECTS
+from .ml_model.explain import DEFAULT_TOP_K, ExplanationUnavailable, explain_rows
+from .cache import cached_predict, prediction_cache
+from .history import history_writer, record_predictions
+from .metrics import metrics, stage
+from .executor import cpu_executor
+from .validation import student_validator
+from .metadata import metadata_responses
+from .datasets import dataset_store
+
+
+def resolve_subject(params, data=None):
+    """
+    Pick the subject a request is for.
+    
+    The ``subject`` query parameter wins, then a ``subject`` key in an
+    object body; without either the default subject is used.
+    
+    Returns:
+        Tuple of (subject, error message)
+    """
+    subject = params.get('subject')
+    if not subject and isinstance(data, dict):
+        subject = data.get('subject')
+    subject = subject or DEFAULT_SUBJECT
+    if subject not in SUBJECTS:
+        return None, f"Unknown subject: {subject}. Available: {', '.join(SUBJECTS)}"
+    return subject, None
+
+
+def resolve_explain(params, data=None):
+    """
+    Read the ``explain`` and ``top_k`` options of a prediction request.
+    
+    Like ``subject``, they come from the query string or an object body.
+    
+    Returns:
+        Tuple of (contributions to return per prediction, 0 for none;
+        error message)
+    """
+    body = data if isinstance(data, dict) else {}
+    explain = params.get('explain', body.get('explain', False))
+    if str(explain).lower() not in ('true', '1'):
+        return 0, None
+    try:
+        top_k = int(params.get('top_k', body.get('top_k', DEFAULT_TOP_K)))
+    except (TypeError, ValueError):
+        return 0, 'top_k must be a positive integer'
+    if top_k < 1:
+        return 0, 'top_k must be a positive integer'
+    return top_k, None
+
+
+def _active_model_or_none(subject=DEFAULT_SUBJECT):
+    """
+    Return the subject's active model version, or None if it is not trained yet.
+    
+    Requests are still validated first so bad input gets a 400; the missing
+    model surfaces as a 503 when scoring.
+    """
+    try:
+        return get_active_model(subject)
+    except FileNotFoundError:
+        return None
+
+
+def validate_and_predict(data, subject=DEFAULT_SUBJECT, explain_top_k=0):
+    """
+    Validate one student's features and predict their final grade.
+    
+    Shared by the sync and async prediction views. With ``explain_top_k``
+    the top feature contributions are computed from the same encoded row.
+    
+    Returns:
+        Tuple of (validated data, predicted grade, explanation or None,
+        errors); on invalid input only ``errors`` is set
+    
+    Raises:
+        FileNotFoundError: If the subject has no trained model
+        ExplanationUnavailable: If an explanation is asked of a non-linear model
+    """
+    active = _active_model_or_none(subject)
+    
+    with stage('validate'):
+        X = None
+        if active is not None:
+            X = np.zeros((1, active.encoder.n_features))
+        input_data, errors = student_validator.validate(
+            data, active and active.encoder, None if X is None else X[0]
+        )
+    
+    if errors is not None:
+        return None, None, None, errors
+    
+    if active is None:
+        # Let the registry raise the subject's FileNotFoundError
+        active = get_active_model(subject)
+    
+    explanation = None
+    if explain_top_k:
+        with stage('explain'):
+            explanation = explain_rows(active, X, explain_top_k)[0]
+    return input_data, cached_predict(input_data, active=active, X=X), explanation, None
+
+
+def with_feature_values(explanation, input_data):
+    """Add each explained feature's input value to an explanation."""
+    for entry in explanation['contributions']:
+        entry['value'] = input_data.get(entry['feature'])
+    return explanation
+
+
+def prediction_result(input_data, predicted_grade, prediction, explanation=None):
+    """
+    Response body for a single prediction.
+    
+    ``percentile`` ranks the prediction among the students of its subject in
+    that subject's training cohort; it is None until that cohort index has
+    been built.
+    ``explanation`` is included only when one was asked for.
+    """
+    cohort = get_cohort_index(prediction.subject)
+    result = {
+        'predicted_grade': round(predicted_grade, 2),
+        'input_data': input_data,
+        'prediction_id': prediction.uuid,
+        'subject': prediction.subject,
+        'percentile': (
+            cohort.subject_percentile(predicted_grade, prediction.subject) if cohort is not None else None
+        ),
+    }
+    if explanation is not None:
+        result['explanation'] = with_feature_values(explanation, input_data)
+    return result
 
 
 @api_view(['POST'])
 def predict_grade(request):
     """
     Predict student's final grade based on input features.
+    
+    ``subject`` (query parameter or body field) picks the subject's model;
+    ``explain=true`` adds the ``top_k`` (default 5) largest feature
+    contributions to the grade, or answers 409 if the subject's model is
+    not linear.
     """
-    serializer = StudentDataSerializer(data=request.data)
+    with stage('parse'):
+        data = request.data
     
-    if not serializer.is_valid():
+    subject, error = resolve_subject(request.query_params, data)
+    if not error:
+        top_k, error = resolve_explain(request.query_params, data)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        input_data, predicted_grade, explanation, errors = validate_and_predict(data, subject, top_k)
+        if errors is not None:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Save prediction to database (behind the response when enabled)
+        prediction = Prediction.build(input_data, predicted_grade, subject=subject)
+        with stage('db_write'):
+            record_predictions([prediction])
+        
+        result = prediction_result(input_data, predicted_grade, prediction, explanation)
+        
+        return Response(result, status=status.HTTP_200_OK)
+    
+    except FileNotFoundError as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    except ExplanationUnavailable as e:
+        return Response(
+            {'error': f'{e}; retry without explain'},
+            status=status.HTTP_409_CONFLICT
+        )
+    except Exception as e:
+        return Response(
+            {'error': f'Prediction failed: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['POST'])
+def predict_batch(request):
+    """
+    Predict final grades for a list of students in one request.
+    
+    Invalid rows are reported individually and do not fail the batch. The
+    ``subject`` query parameter picks the model for every row, and
+    ``explain=true`` adds each row's ``top_k`` largest feature contributions.
+    """
+    subject, error = resolve_subject(request.query_params)
+    if not error:
+        top_k, error = resolve_explain(request.query_params)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer = StudentDataSerializer(data=request.data, many=True)
+    
+    if not isinstance(request.data, list):
+        serializer.is_valid()
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-    input_data = serializer.validated_data
+    max_size = getattr(settings, 'PREDICT_BATCH_MAX_SIZE', 10000)
+    if len(request.data) > max_size:
+        return Response(
+            {'error': f'Batch too large: at most {max_size} rows are allowed'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    valid_rows = []
+    valid_indexes = []
+    results = [None] * len(request.data)
+    
+    active = _active_model_or_none(subject)
+    encoder = active and active.encoder
+    X = None
+    if active is not None:
+        X = np.zeros((len(request.data), encoder.n_features))
+    
+    with stage('batch_validate'):
+        for index, item in enumerate(request.data):
+            row = None if X is None else X[len(valid_rows)]
+            input_data, errors = student_validator.validate(item, encoder, row)
+            if errors is None:
+                valid_rows.append(input_data)
+                valid_indexes.append(index)
+            else:
+                results[index] = {'index': index, 'errors': errors}
     
     try:
-        predicted_grade = predict(input_data)
+        with stage('batch_score'):
+            if active is None:
+                predicted_grades = predict_many(valid_rows, subject)
+            else:
+                predicted_grades = active.predict_many_encoded(X[:len(valid_rows)])
         
-        # Save prediction to database
-        prediction = Prediction.objects.create(
-            input_data=input_data,
-            predicted_grade=predicted_grade
-        )
+        explanations = [None] * len(valid_rows)
+        if top_k and valid_rows:
+            with stage('explain'):
+                if active is None:
+                    active = get_active_model(subject)
+                explanations = explain_rows(active, X[:len(valid_rows)], top_k)
         
-        result = {
-            'predicted_grade': round(predicted_grade, 2),
-            'input_data': input_data,
-            'prediction_id': prediction.id
-        }
+        # Save all predictions to database in one INSERT
+        predictions = [
+            Prediction.build(input_data, predicted_grade, subject=subject)
+            for input_data, predicted_grade in zip(valid_rows, predicted_grades)
+        ]
+        with stage('db_write'):
+            record_predictions(predictions)
         
-        return Response(result, status=status.HTTP_200_OK)
+        for index, input_data, predicted_grade, prediction, explanation in zip(
+            valid_indexes, valid_rows, predicted_grades, predictions, explanations
+        ):
+            results[index] = {
+                'index': index,
+                'predicted_grade': round(predicted_grade, 2),
+                'input_data': input_data,
+                'prediction_id': prediction.uuid
+            }
+            if explanation is not None:
+                results[index]['explanation'] = with_feature_values(explanation, input_data)
+        
+        return Response({
+            'subject': subject,
+            'count': len(results),
+            'succeeded': len(valid_rows),
+            'failed': len(results) - len(valid_rows),
+            'results': results
+        }, status=status.HTTP_200_OK)
     
     except FileNotFoundError as e:
         return Response(
             {'error': str(e)},
             status=status.HTTP_503_SERVICE_UNAVAILABLE
         )
+    except ExplanationUnavailable as e:
+        return Response(
+            {'error': f'{e}; retry without explain'},
+            status=status.HTTP_409_CONFLICT
+        )
     except Exception as e:
         return Response(
             {'error': f'Prediction failed: {str(e)}'},
@@ -50,103 +317,517 @@ def predict_grade(request):
         )
 
 
-@api_view(['GET'])
-def model_info(request):
+DEFAULT_SENSITIVITY_FEATURES = ['studytime', 'absences', 'failures']
+
+
+def _sweep_values(field):
+    """Every allowed value of a student field, in order."""
+    if hasattr(field, 'choices'):
+        return list(field.choices)
+    return list(range(field.min_value, field.max_value + 1))
+
+
+@api_view(['POST'])
+def predict_sensitivity(request):
     """
-    Get information about the trained model.
+    Show how a student's predicted grade responds to changing one feature.
+    
+    Body:
+        student: the student's features, as for /predict/
+        features: features to sweep (default studytime, absences, failures)
+        values: optional {feature: [values]} overriding the full range
+        subject: optional subject whose model to use
+    
+    Each feature is swept on its own with the rest of the profile held
+    fixed. Nothing is written to the prediction history.
     """
+    data = request.data
+    if not isinstance(data, dict):
+        return Response(
+            {'error': 'Expected an object with student and features'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    subject, error = resolve_subject(request.query_params, data)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+    
+    fields = StudentDataSerializer().fields
+    features = data.get('features') or DEFAULT_SENSITIVITY_FEATURES
+    overrides = data.get('values') or {}
+    if not isinstance(features, list) or not isinstance(overrides, dict):
+        return Response(
+            {'error': 'features must be a list and values an object'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    unknown = sorted(({str(name) for name in features} | set(overrides)) - set(fields))
+    if unknown:
+        return Response(
+            {'error': f"Unknown features: {', '.join(unknown)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    sweeps = []
+    value_errors = {}
+    for feature in dict.fromkeys(features):
+        if feature not in overrides:
+            sweeps.append((feature, _sweep_values(fields[feature])))
+            continue
+        values = overrides[feature]
+        if not isinstance(values, list) or not values:
+            value_errors[feature] = ['Expected a non-empty list of values.']
+            continue
+        try:
+            sweeps.append((feature, [fields[feature].run_validation(value) for value in values]))
+        except ValidationError as e:
+            value_errors[feature] = e.detail
+    if value_errors:
+        return Response({'values': value_errors}, status=status.HTTP_400_BAD_REQUEST)
+    
+    max_points = getattr(settings, 'PREDICT_SENSITIVITY_MAX_POINTS', 1000)
+    if sum(len(values) for _, values in sweeps) > max_points:
+        return Response(
+            {'error': f'Too many sweep points: at most {max_points} are allowed'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
     try:
-        info = get_model_info()
+        active = get_active_model(subject)
+        row = np.zeros(active.encoder.n_features)
+        with stage('validate'):
+            input_data, errors = student_validator.validate(data.get('student', {}), active.encoder, row)
+        if errors is not None:
+            return Response({'student': errors}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Imported here like the streaming module: only this endpoint needs it
+        from .ml_model.sensitivity import sensitivity_curves
+        
+        with stage('sensitivity_score'):
+            baseline, curves = sensitivity_curves(active, row, sweeps)
+        
         return Response({
-            'model_type': 'Linear Regression',
-            'metrics': {
-                'mean_squared_error': round(info['mse'], 4),
-                'r2_score': round(info['r2'], 4),
+            'predicted_grade': round(baseline, 2),
+            'input_data': input_data,
+            'subject': subject,
+            'model_version': active.version,
+            'curves': {
+                feature: [
+                    {
+                        'value': value,
+                        'predicted_grade': round(grade, 2),
+                        'delta': round(grade - baseline, 2),
+                    }
+                    for value, grade in zip(values, curves[feature])
+                ]
+                for feature, values in sweeps
             },
-            'dataset': {
-                'train_samples': info['train_size'],
-                'test_samples': info['test_size'],
-            }
-        })
+        }, status=status.HTTP_200_OK)
+    
+    except FileNotFoundError as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    except Exception as e:
+        return Response(
+            {'error': f'Prediction failed: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['POST'])
+def predict_upload(request):
+    """
+    Score an uploaded roster file and stream the results back.
+    
+    Expects a multipart upload in the ``file`` field, semicolon-separated
+    like data/student-mat.csv. ``output`` selects csv (default) or ndjson
+    and ``subject`` the model to score with. Rows with values the single
+    prediction endpoint would reject get an empty prediction.
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response(
+            {'error': 'No file uploaded'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # pandas is only needed here, so keep it out of every other request path
+    from .ml_model.streaming import OUTPUT_FORMATS, read_columns, stream_scores
+    
+    output_format = request.query_params.get('output') or request.data.get('output') or 'csv'
+    if output_format not in OUTPUT_FORMATS:
+        return Response(
+            {'error': f'Unsupported format: {output_format}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    subject, error = resolve_subject(request.query_params, request.data)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Check the header now: once streaming starts, errors can no longer be a 400
+    ranges, choices = student_validator.rules()
+    try:
+        columns = read_columns(upload)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if not set(columns) & (set(ranges) | set(choices)):
+        return Response(
+            {'error': 'The roster has no student feature columns; expected a semicolon-separated '
+                      'header like data/student-mat.csv'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        load_model(subject)
     except FileNotFoundError as e:
         return Response(
             {'error': str(e)},
             status=status.HTTP_503_SERVICE_UNAVAILABLE
         )
+    
+    content_type = 'text/csv' if output_format == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(
+        stream_scores(
+            upload,
+            output_format=output_format,
+            chunk_size=settings.PREDICT_STREAM_CHUNK_SIZE,
+            defaults=get_student_defaults(),
+            subject=subject,
+            ranges=ranges,
+            choices=choices,
+        ),
+        content_type=content_type
+    )
+    name = os.path.splitext(os.path.basename(upload.name))[0]
+    response['Content-Disposition'] = f'attachment; filename="{name}-predictions.{output_format}"'
+    return response
+
+
+def model_info(request):
+    """
+    Get information about the trained model.
+    
+    ``subject`` picks the model described (default subject otherwise). The
+    body is rendered once per model version and served with an ETag; the
+    prediction cache counters change on every request, so they are served
+    by model_cache_stats() instead.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    subject, error = resolve_subject(request.GET)
+    if error:
+        return JsonResponse({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        return metadata_responses.model_info(subject).respond(request)
+    except FileNotFoundError as e:
+        return JsonResponse({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+def model_cache_stats(request):
+    """
+    Get the prediction cache's size and hit/miss counters.
+    
+    Kept out of the model-info body so that body can stay pre-rendered and
+    ETag'd; this one is small, live and never cached.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    response = JsonResponse({'prediction_cache': prediction_cache.stats()})
+    response['Cache-Control'] = 'no-store'
+    return response
 
 
-@api_view(['GET'])
 def feature_options(request):
     """
     Get available options for categorical features.
+    
+    Served from a body rendered once, with an ETag.
     """
-    options = {
-        'school': [{'value': 'GP', 'label': 'Gabriel Pereira'}, {'value': 'MS', 'label': 'Mousinho da Silveira'}],
-        'sex': [{'value': 'F', 'label': 'Female'}, {'value': 'M', 'label': 'Male'}],
-        'address': [{'value': 'U', 'label': 'Urban'}, {'value': 'R', 'label': 'Rural'}],
-        'famsize': [{'value': 'GT3', 'label': 'Greater than 3'}, {'value': 'LE3', 'label': 'Less or equal to 3'}],
-        'Pstatus': [{'value': 'T', 'label': 'Living together'}, {'value': 'A', 'label': 'Apart'}],
-        'Mjob': [{'value': 'teacher', 'label': 'Teacher'}, {'value': 'health', 'label': 'Health care'}, 
-                 {'value': 'services', 'label': 'Civil services'}, {'value': 'at_home', 'label': 'At home'}, 
-                 {'value': 'other', 'label': 'Other'}],
-        'Fjob': [{'value': 'teacher', 'label': 'Teacher'}, {'value': 'health', 'label': 'Health care'}, 
-                 {'value': 'services', 'label': 'Civil services'}, {'value': 'at_home', 'label': 'At home'}, 
-                 {'value': 'other', 'label': 'Other'}],
-        'reason': [{'value': 'home', 'label': 'Close to home'}, {'value': 'reputation', 'label': 'School reputation'}, 
-                   {'value': 'course', 'label': 'Course preference'}, {'value': 'other', 'label': 'Other'}],
-        'guardian': [{'value': 'mother', 'label': 'Mother'}, {'value': 'father', 'label': 'Father'}, 
-                     {'value': 'other', 'label': 'Other'}],
-        'schoolsup': [{'value': 'yes', 'label': 'Yes'}, {'value': 'no', 'label': 'No'}],
-        'famsup': [{'value': 'yes', 'label': 'Yes'}, {'value': 'no', 'label': 'No'}],
-        'paid': [{'value': 'yes', 'label': 'Yes'}, {'value': 'no', 'label': 'No'}],
-        'activities': [{'value': 'yes', 'label': 'Yes'}, {'value': 'no', 'label': 'No'}],
-        'nursery': [{'value': 'yes', 'label': 'Yes'}, {'value': 'no', 'label': 'No'}],
-        'higher': [{'value': 'yes', 'label': 'Yes'}, {'value': 'no', 'label': 'No'}],
-        'internet': [{'value': 'yes', 'label': 'Yes'}, {'value': 'no', 'label': 'No'}],
-        'romantic': [{'value': 'yes', 'label': 'Yes'}, {'value': 'no', 'label': 'No'}],
-    }
-    return Response(options)
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    return metadata_responses.feature_options().respond(request)
 
 
-@api_view(['GET'])
-def prediction_history(request):
+def cohort_stats(request):
     """
-    Get recent prediction history.
+    Get grade distributions of the training cohort.
+    
+    Histograms and quantiles of predicted and actual final grades, for the
+    whole cohort and per school and subject, precomputed at training time
+    for the model of the requested ``subject``.
     """
-    predictions = Prediction.objects.all()[:20]
-    serializer = PredictionSerializer(predictions, many=True)
-    return Response(serializer.data)
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    subject, error = resolve_subject(request.GET)
+    if error:
+        return JsonResponse({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+    entry = metadata_responses.cohort_stats(subject)
+    if entry is None:
+        return JsonResponse(
+            {'error': 'Cohort index not found. Please run train_model.py --cohort-index first.'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    return entry.respond(request)
+
+
+def _parse_datetime(value):
+    parsed = datetime.fromisoformat(value)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _encode_cursor(prediction):
+    raw = f'{prediction.created_at.isoformat()}|{prediction.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+    created_at, pk = raw.rsplit('|', 1)
+    return _parse_datetime(created_at), int(pk)
+
+
+def history_query(params):
+    """
+    Build the prediction-history queryset from query parameters.
+    
+    Query parameters:
+        limit: page size (default 20, max 100)
+        cursor: opaque cursor from the previous page's X-Next-Cursor header
+        school, grade_band, subject: filter on the indexed denormalized columns
+        since, until: ISO-8601 bounds on created_at
+        fields: comma-separated subset of fields to return
+    
+    Returns:
+        Tuple of (queryset of limit + 1 rows, limit, fields, error message)
+    """
+    predictions = Prediction.objects.all()
+    
+    try:
+        limit = min(max(int(params.get('limit', 20)), 1), 100)
+        if params.get('cursor'):
+            created_at, pk = _decode_cursor(params['cursor'])
+            predictions = predictions.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            )
+        if params.get('since'):
+            predictions = predictions.filter(created_at__gte=_parse_datetime(params['since']))
+        if params.get('until'):
+            predictions = predictions.filter(created_at__lt=_parse_datetime(params['until']))
+    except ValueError:
+        return None, None, None, 'Invalid limit, cursor or date parameter'
+    
+    if params.get('school'):
+        predictions = predictions.filter(school=params['school'])
+    if params.get('grade_band'):
+        if params['grade_band'] not in GRADE_BANDS:
+            return None, None, None, f"grade_band must be one of {', '.join(GRADE_BANDS)}"
+        predictions = predictions.filter(grade_band=params['grade_band'])
+    if params.get('subject'):
+        if params['subject'] not in SUBJECTS:
+            return None, None, None, f"subject must be one of {', '.join(SUBJECTS)}"
+        predictions = predictions.filter(subject=params['subject'])
+    
+    fields = None
+    if params.get('fields'):
+        fields = [name.strip() for name in params['fields'].split(',') if name.strip()]
+        unknown = set(fields) - set(PredictionSerializer.Meta.fields)
+        if unknown:
+            return None, None, None, f"Unknown fields: {', '.join(sorted(unknown))}"
+        # Skip loading columns (notably the input_data blob) nobody asked for
+        predictions = predictions.only(*set(fields) | {'id', 'created_at'})
+    
+    return predictions.order_by('-created_at', '-id')[:limit + 1], limit, fields, None
+
+
+def add_next_page_headers(response, request, params, page):
+    """Advertise the page after ``page`` through X-Next-Cursor and Link."""
+    query = params.copy()
+    query['cursor'] = _encode_cursor(page[-1])
+    response['X-Next-Cursor'] = query['cursor']
+    response['Link'] = f'<{request.build_absolute_uri(request.path)}?{query.urlencode()}>; rel="next"'
 
 
 @api_view(['GET'])
-def download_dataset(request, filename):
+def prediction_history(request):
     """
-    Download a dataset file.
+    Get prediction history, newest first.
+    
+    See history_query() for the supported query parameters. The body stays
+    a plain list; the next page is advertised through the X-Next-Cursor and
+    Link headers.
+    
+    With PREDICTION_WRITE_BEHIND on, history is eventually consistent: a
+    prediction made in the last PREDICTION_WRITE_INTERVAL seconds may not be
+    listed yet.
     """
-    # Define the base data directory
-    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    params = request.query_params
+    predictions, limit, fields, error = history_query(params)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
     
-    # Allowed dataset files for security
-    allowed_files = ['student-mat.csv', 'student-por.csv']
+    page = list(predictions)
+    has_next = len(page) > limit
+    page = page[:limit]
     
-    if filename not in allowed_files:
-        raise Http404("Dataset not found")
+    serializer = PredictionSerializer(page, many=True, fields=fields)
+    response = Response(serializer.data)
     
-    # Construct file path
-    file_path = os.path.join(base_dir, 'data', filename)
+    if has_next:
+        add_next_page_headers(response, request, params, page)
     
-    # Check if file exists
-    if not os.path.exists(file_path):
-        raise Http404("Dataset file not found")
+    return response
+
+
+@api_view(['POST'])
+def record_outcome(request, prediction_id):
+    """
+    Record the confirmed final grade for an earlier prediction.
+    
+    ``manage.py update_model`` later folds confirmed grades into the model.
+    """
+    serializer = OutcomeSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-    # Return file as response
     try:
-        response = FileResponse(open(file_path, 'rb'), content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        return response
-    except Exception as e:
+        prediction = Prediction.objects.get(uuid=prediction_id)
+    except Prediction.DoesNotExist:
+        # With write-behind the row may still be queued in this process;
+        # wait for that row only, and not for longer than two flushes
+        timeout = 2 * getattr(settings, 'PREDICTION_WRITE_INTERVAL', 0.5)
+        history_writer.wait_written(prediction_id, timeout)
+        try:
+            prediction = Prediction.objects.get(uuid=prediction_id)
+        except Prediction.DoesNotExist:
+            raise Http404("Prediction not found")
+    
+    if prediction.applied_version:
         return Response(
-            {'error': f'Failed to download file: {str(e)}'},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            {'error': f'Outcome already applied to model version {prediction.applied_version}'},
+            status=status.HTTP_409_CONFLICT
         )
+    
+    prediction.actual_grade = serializer.validated_data['actual_grade']
+    prediction.confirmed_at = timezone.now()
+    prediction.save(update_fields=['actual_grade', 'confirmed_at'])
+    
+    return Response(PredictionSerializer(prediction).data, status=status.HTTP_200_OK)
+
+
+def dataset_manifest(request):
+    """
+    List the downloadable datasets.
+    
+    Each entry has the file's size, row count, SHA-256 and compressed sizes;
+    the listing is rendered once per set of file hashes, with an ETag.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    return dataset_store.manifest().respond(request)
+
 
+def download_dataset(request, filename):
+    """
+    Download a dataset file.
+    
+    Served from memory with an ETag and Last-Modified for conditional GETs,
+    single byte ranges for resumed downloads, and precompressed gzip (or
+    brotli) bodies for clients that accept them.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    try:
+        dataset = dataset_store.get(filename)
+    except FileNotFoundError:
+        raise Http404("Dataset file not found")
+    if dataset is None:
+        raise Http404("Dataset not found")
+    return dataset.respond(request)
+
+
+def dataset_query(request, filename):
+    """
+    Filter, group and aggregate a dataset on the server.
+    
+    See predictor.dataset_index for the query parameters. Queries run
+    against an in-memory columnar index built once per file version; the
+    ETag covers the file hash and the parameters, so repeating a query
+    against an unchanged file is a 304.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    try:
+        dataset = dataset_store.get(filename)
+    except FileNotFoundError:
+        raise Http404("Dataset file not found")
+    if dataset is None:
+        raise Http404("Dataset not found")
+    
+    params = request.GET
+    query = '&'.join(sorted(f'{name}={value}' for name, value in params.items()))
+    etag = '"%s"' % hashlib.sha256(f'{dataset.sha256}?{query}'.encode()).hexdigest()[:32]
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        try:
+            body = dataset_store.index(dataset).query(params)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        body['dataset'] = dataset.name
+        response = JsonResponse(body)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def prometheus_metrics(request):
+    """
+    Expose request, stage, cache, history and model metrics for Prometheus.
+    """
+    if not metrics.enabled:
+        raise Http404("Metrics are disabled")
+    
+    cache = prediction_cache.stats()
+    extra = [
+        ('predictor_prediction_cache_hits_total', 'counter', 'Prediction cache hits.',
+         [({}, cache['hits'])]),
+        ('predictor_prediction_cache_misses_total', 'counter', 'Prediction cache misses.',
+         [({}, cache['misses'])]),
+        ('predictor_prediction_cache_entries', 'gauge', 'Entries in the prediction cache.',
+         [({}, cache['size'])]),
+        ('predictor_history_queue_depth', 'gauge', 'Prediction rows waiting to be written.',
+         [({}, history_writer.pending())]),
+        ('predictor_history_written_total', 'counter', 'Prediction rows written behind requests.',
+         [({}, history_writer.written)]),
+        ('predictor_history_failed_total', 'counter', 'Prediction rows that failed to write.',
+         [({}, history_writer.failed)]),
+        ('predictor_executor_pending', 'gauge', 'Async-view jobs running or queued for a CPU worker.',
+         [({}, cpu_executor.pending())]),
+        ('predictor_executor_rejected_total', 'counter', 'Async-view jobs rejected with a full queue.',
+         [({}, cpu_executor.rejected)]),
+    ]
+    try:
+        info = get_model_info()
+        extra.append((
+            'predictor_model_info', 'gauge', 'Active model version (value is always 1).',
+            [({'version': info['version'], 'model_type': info['model_type']}, 1)]
+        ))
+    except FileNotFoundError:
+        pass
+    loaded = subjects.loaded()
+    extra += [
+        ('predictor_subject_model_loaded', 'gauge', 'Whether a subject\'s model is in memory.',
+         [({'subject': subject}, int(subject in loaded)) for subject in SUBJECTS]),
+        ('predictor_subject_model_bytes', 'gauge', 'Artifact bytes of the loaded subject models.',
+         [({}, subjects.footprint())]),
+        ('predictor_subject_evictions_total', 'counter', 'Subject models evicted for the memory budget.',
+         [({}, subjects.evictions)]),
+    ]
+    
+    return HttpResponse(
+        metrics.render(extra),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -7,6 +7,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'student_performance.settings')
+# Route the hot API endpoints to the async-native views under ASGI
+os.environ.setdefault('PREDICTOR_ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
 
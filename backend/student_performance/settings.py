@@ -31,6 +31,9 @@ ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(','
 # Google OAuth settings
 GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID', '')
 GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET', '')
+# Where Google's ID-token signing certificates are fetched from (and cached)
+GOOGLE_CERTS_URL = os.environ.get('GOOGLE_CERTS_URL', 'https://www.googleapis.com/oauth2/v1/certs')
+GOOGLE_CERTS_TIMEOUT = float(os.environ.get('GOOGLE_CERTS_TIMEOUT', '5'))
 
 # Application definition
 INSTALLED_APPS = [
@@ -48,6 +51,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'predictor.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -122,7 +126,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.backends.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
 }
@@ -140,3 +144,31 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
 }
 
+# JWT user resolution (authentication.backends.CachedJWTAuthentication)
+AUTH_USER_CACHE_SIZE = int(os.environ.get('AUTH_USER_CACHE_SIZE', '1024'))
+AUTH_USER_CACHE_TTL = float(os.environ.get('AUTH_USER_CACHE_TTL', '60'))
+# Build GET/HEAD/OPTIONS users from token claims alone, with no lookup at all
+AUTH_STATELESS_READ_ONLY = os.environ.get('AUTH_STATELESS_READ_ONLY', 'False') == 'True'
+
+
+# Predictor settings
+PREDICT_BATCH_MAX_SIZE = int(os.environ.get('PREDICT_BATCH_MAX_SIZE', '10000'))
+PREDICT_SENSITIVITY_MAX_POINTS = int(os.environ.get('PREDICT_SENSITIVITY_MAX_POINTS', '1000'))
+PREDICT_STREAM_CHUNK_SIZE = int(os.environ.get('PREDICT_STREAM_CHUNK_SIZE', '5000'))
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', '4096'))
+PREDICTOR_MODEL_RELOAD_INTERVAL = float(os.environ.get('PREDICTOR_MODEL_RELOAD_INTERVAL', '5'))
+# Upper bound on loaded subject models (artifact bytes); 0 keeps every subject loaded
+PREDICTOR_MODEL_MEMORY_BUDGET_MB = float(os.environ.get('PREDICTOR_MODEL_MEMORY_BUDGET_MB', '0'))
+PREDICTOR_WARMUP = os.environ.get('PREDICTOR_WARMUP', 'True') == 'True'
+# Also index the dataset CSVs at startup (imports pandas in every serving worker)
+PREDICTOR_DATASET_WARMUP = os.environ.get('PREDICTOR_DATASET_WARMUP', 'False') == 'True'
+# Write prediction history behind the request; /predictions/ is then eventually
+# consistent, lagging by up to PREDICTION_WRITE_INTERVAL seconds
+PREDICTION_WRITE_BEHIND = os.environ.get('PREDICTION_WRITE_BEHIND', 'True') == 'True'
+PREDICTION_WRITE_BATCH_SIZE = int(os.environ.get('PREDICTION_WRITE_BATCH_SIZE', '500'))
+PREDICTION_WRITE_INTERVAL = float(os.environ.get('PREDICTION_WRITE_INTERVAL', '0.5'))
+PREDICTION_WRITE_MAX_QUEUE = int(os.environ.get('PREDICTION_WRITE_MAX_QUEUE', '10000'))
+PREDICTOR_METRICS_ENABLED = os.environ.get('PREDICTOR_METRICS_ENABLED', 'True') == 'True'
+PREDICTOR_ASYNC_VIEWS = os.environ.get('PREDICTOR_ASYNC_VIEWS', 'False') == 'True'
+PREDICTOR_ASYNC_WORKERS = int(os.environ.get('PREDICTOR_ASYNC_WORKERS', '0')) or None
+PREDICTOR_ASYNC_MAX_QUEUE = int(os.environ.get('PREDICTOR_ASYNC_MAX_QUEUE', '64'))
@@ -3,8 +3,10 @@ URL configuration for student_performance project.
 """
 from django.contrib import admin
 from django.urls import path, include
+from predictor.views import prometheus_metrics
 
 urlpatterns = [
+    path('metrics', prometheus_metrics, name='metrics'),
     path('admin/', admin.site.urls),
     path('api/', include('predictor.urls')),
     path('api/auth/', include('authentication.urls')),